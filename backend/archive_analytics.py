@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Analytics retention: archive raw events older than the retention window, then drop them
+
+The analytics table keeps only recent raw events; dashboards read analytics_daily
+and active_user_sketches, which keep every day. Run this from cron (e.g. nightly).
+Work is done one calendar month at a time, oldest first, for months that ended
+before the retention cutoff:
+
+  1. compact  - days whose rollups are missing events are rebuilt from the raw rows
+  2. archive  - the month is written to ANALYTICS_ARCHIVE_DIR as gzipped JSONL
+                (or Parquet with pandas + pyarrow), named by month and id range
+  3. drop     - the archived rows are deleted in small batches
+
+Event types in RETAINED_EVENTS (moderation state such as admin_post_flagged) stay
+in the table: they are neither archived nor dropped, so a rerun never archives them
+again. A rerun after a crash archives whatever is left of a month into a new file,
+so no row is lost (a few may appear in two files).
+
+Usage:
+  python archive_analytics.py --dry-run
+  python archive_analytics.py --days 180 --format jsonl
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+from datetime import datetime, date, timedelta
+
+import pytz
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+RETENTION_DAYS = int(os.environ.get("ANALYTICS_RETENTION_DAYS", "180"))
+ARCHIVE_DIR = os.environ.get("ANALYTICS_ARCHIVE_DIR", "archive/analytics")
+MIN_RETENTION_DAYS = 31      # last-login status and the exact active-user windows read raw logins up to 30 days back
+RETAINED_EVENTS = ("admin_post_flagged",)
+COLUMNS = ("id", "event_id", "user_id", "event_type", "event_data", "timestamp", "ip_address", "user_agent")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Archive and drop raw analytics events past the retention window")
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS, help="raw events kept, in days")
+    parser.add_argument("--dir", default=ARCHIVE_DIR, help="where monthly archive files go")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per read/delete batch")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be archived, change nothing")
+    args = parser.parse_args()
+    if args.days < MIN_RETENTION_DAYS:
+        parser.error(f"--days must be at least {MIN_RETENTION_DAYS}")
+    return args
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def expired_months(server, cutoff):
+    """[start, end) of each month holding droppable events that ended on or before cutoff"""
+    Analytics = server.Analytics
+    oldest = server.db.session.query(server.db.func.min(Analytics.timestamp)).filter(
+        Analytics.event_type.notin_(RETAINED_EVENTS)
+    ).scalar()
+    if not oldest:
+        return []
+    months = []
+    start = month_start(oldest.date())
+    while next_month(start) <= cutoff:
+        months.append((start, next_month(start)))
+        start = next_month(start)
+    return months
+
+
+def droppable(server, start, end):
+    Analytics = server.Analytics
+    return Analytics.query.filter(
+        Analytics.timestamp >= start, Analytics.timestamp < end, Analytics.event_type.notin_(RETAINED_EVENTS)
+    ).count()
+
+
+def compact(server, start, end):
+    """Rebuild the rollups of days where they hold fewer events than the raw table"""
+    db, Analytics, AnalyticsDaily = server.db, server.Analytics, server.AnalyticsDaily
+    day = db.func.date(Analytics.timestamp)
+    raw = dict(db.session.query(day, db.func.count(Analytics.id)).filter(
+        Analytics.timestamp >= start, Analytics.timestamp < end
+    ).group_by(day).all())
+    rolled = dict(db.session.query(AnalyticsDaily.day, db.func.sum(AnalyticsDaily.count)).filter(
+        AnalyticsDaily.day >= start, AnalyticsDaily.day < end, AnalyticsDaily.user_id == ''
+    ).group_by(AnalyticsDaily.day).all())
+    missing = sorted(d for d, count in raw.items() if count > int(rolled.get(d) or 0))
+    for d in missing:
+        d = d if isinstance(d, date) else date.fromisoformat(str(d))
+        server.rebuild_analytics_daily(since=d, until=d + timedelta(days=1))
+    return len(missing)
+
+
+def read_month(server, start, end, batch_size):
+    """Droppable raw rows of the month as dicts, in id order (keyset batches, no OFFSET)"""
+    table = server.Analytics.__table__
+    last_id = 0
+    while True:
+        rows = server.db.session.execute(
+            server.db.select(table).where(
+                table.c.timestamp >= start, table.c.timestamp < end, table.c.id > last_id,
+                table.c.event_type.notin_(RETAINED_EVENTS)
+            ).order_by(table.c.id).limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            return
+        for row in rows:
+            yield {name: row[name] for name in COLUMNS}
+        last_id = rows[-1]["id"]
+
+
+def serializable(row):
+    row = dict(row)
+    if row["timestamp"] is not None:
+        row["timestamp"] = row["timestamp"].isoformat()
+    return row
+
+
+def write_archive(rows, directory, label, fmt):
+    """Write rows to <dir>/analytics-<label>-<first id>-<last id>.<ext>; returns (path, count, last id)"""
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, f".analytics-{label}.tmp")
+    first_id = last_id = None
+    count = 0
+    if fmt == "parquet":
+        import pandas as pd  # pandas needs pyarrow (or fastparquet) installed to write Parquet
+        records = [serializable(row) for row in rows]
+        if records:
+            frame = pd.DataFrame.from_records(records, columns=list(COLUMNS))
+            frame["event_data"] = frame["event_data"].map(lambda v: json.dumps(v, ensure_ascii=False))
+            frame.to_parquet(tmp, index=False, compression="zstd")
+            first_id, last_id, count = records[0]["id"], records[-1]["id"], len(records)
+        ext = "parquet"
+    else:
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(serializable(row), ensure_ascii=False) + "\n")
+                first_id = row["id"] if first_id is None else first_id
+                last_id = row["id"]
+                count += 1
+        ext = "jsonl.gz"
+    if not count:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return None, 0, None
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    path = os.path.join(directory, f"analytics-{label}-{first_id}-{last_id}.{ext}")
+    os.replace(tmp, path)
+    return path, count, last_id
+
+
+def drop(server, start, end, last_id, batch_size):
+    """Delete the archived, non-retained rows of the month in small batches (short locks)"""
+    from sqlalchemy import text
+    placeholders = ", ".join(f":keep{i}" for i in range(len(RETAINED_EVENTS)))
+    statement = text(
+        "DELETE FROM analytics WHERE timestamp >= :start AND timestamp < :end AND id <= :last_id "
+        f"AND event_type NOT IN ({placeholders}) ORDER BY id LIMIT :batch"
+    )
+    params = {"start": start, "end": end, "last_id": last_id, "batch": batch_size}
+    params.update({f"keep{i}": event for i, event in enumerate(RETAINED_EVENTS)})
+    deleted = 0
+    while True:
+        with server.db.engine.begin() as conn:
+            count = conn.execute(statement, params).rowcount
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+def main():
+    args = parse_args()
+
+    import server
+
+    today = datetime.now(pytz.timezone("Asia/Kolkata")).date()
+    cutoff = today - timedelta(days=args.days)
+    with server.app.app_context():
+        months = expired_months(server, cutoff)
+        if not months:
+            print(f"Nothing to archive: no droppable events in months ending on or before {cutoff}")
+            return
+        for start, end in months:
+            label = start.strftime("%Y-%m")
+            pending = droppable(server, start, end)
+            if not pending:
+                continue
+            if args.dry_run:
+                print(f"📦 {label}: {pending} events would be archived and dropped")
+                continue
+            rebuilt = compact(server, start, end)
+            if rebuilt:
+                print(f"🧮 {label}: rebuilt rollups for {rebuilt} days")
+            path, archived, last_id = write_archive(read_month(server, start, end, args.batch_size),
+                                                    args.dir, label, args.format)
+            server.db.session.rollback()   # end the read transaction before deleting
+            if not archived:
+                continue
+            deleted = drop(server, start, end, last_id, args.batch_size)
+            print(f"📦 {label}: archived {archived} events to {path}, dropped {deleted}")
+
+
+if __name__ == "__main__":
+    main()
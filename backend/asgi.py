@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+ASGI entrypoint for Impify backend
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000 --workers 2
+
+The LLM-bound endpoints (note upload, flashcard generation) run natively on the
+event loop, so a worker holds many slow generations without a thread each.
+Database work and text extraction still go to a bounded thread pool.
+Every other route is served by the Flask app through WsgiToAsgi.
+
+Each request's LLM calls share one deadline, and a client that disconnects
+stops waiting: its provider calls are cancelled unless another coalesced
+request is still waiting on the same result.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import g
+from flask_jwt_extended import decode_token
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+from server import (
+    app as flask_app, CORS_ORIGINS, generate_notes, generate_flashcards_from_content, extraction_mode,
+    parse_num_cards, flashcard_request_digest, FLASHCARD_MAX_CARDS, prepare_note_upload, save_generated_note, load_note_for_flashcards, save_generated_flashcards,
+    llm_lane, track_event, start_ollama_keeper, idempotency_key_for, claim_idempotency_key, release_idempotency_key
+)
+from services.admission import AdmissionRejected
+from services.aio import run_blocking
+from services.deadline import current_deadline, enter_deadline, exit_deadline
+from services.singleflight import SingleFlight
+
+# Separate from server.request_flights: async followers await futures, not threading events
+async_flights = SingleFlight()
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+def json_response(request, payload, status=200, headers=None):
+    headers = dict(headers or {})
+    origin = request.headers.get('origin')
+    if origin in CORS_ORIGINS:
+        headers['Access-Control-Allow-Origin'] = origin
+        headers['Access-Control-Allow-Credentials'] = 'true'
+        headers['Vary'] = 'Origin'
+    body = payload if isinstance(payload, (str, bytes)) else json.dumps(payload)
+    return Response(body, status_code=status, media_type='application/json', headers=headers)
+
+
+def authenticate(request):
+    """Return the JWT identity from the Authorization header, or None"""
+    auth = request.headers.get('authorization', '')
+    if not auth.lower().startswith('bearer '):
+        return None
+    try:
+        with flask_app.app_context():
+            return decode_token(auth.split(' ', 1)[1])['sub']
+    except Exception:
+        return None
+
+
+async def in_request_context(request, user_id, fn, *args):
+    """Run a sync server helper in a worker thread with Flask request/app context (db session, g, track_event)"""
+    environ = {
+        'REMOTE_ADDR': request.client.host if request.client else '',
+        'HTTP_USER_AGENT': request.headers.get('user-agent', '')
+    }
+
+    def run():
+        with flask_app.test_request_context(request.url.path, method=request.method, environ_base=environ):
+            g.user_id = user_id
+            return fn(*args)
+
+    return await run_blocking(run)
+
+
+async def until_disconnected(request, coro):
+    """Await coro, cancelling it if the client goes away first"""
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+async def coalesced(request, user_id, operation, digest, handler):
+    """Async counterpart of server.single_flight: one leader per key, cross-worker idempotency rows"""
+    client_key = request.headers.get('idempotency-key')
+    key = idempotency_key_for(user_id, operation, client_key or digest)
+
+    async def run():
+        # The claim polls in a worker thread, which doesn't see the deadline: pass what is left of it
+        deadline = current_deadline()
+        claimed = await in_request_context(request, user_id, claim_idempotency_key, key, user_id, operation,
+                                           bool(client_key), deadline.remaining() if deadline else None)
+        if claimed is not True:
+            return claimed[0], claimed[1]
+        result = (None, None)
+        try:
+            payload, status = await handler()
+            result = (json.dumps(payload), status)
+            return result
+        finally:
+            await in_request_context(request, user_id, release_idempotency_key, key, result[0], result[1])
+
+    # The shared task inherits this request's deadline when it is created
+    token = enter_deadline()
+    try:
+        (body, status), shared = await until_disconnected(request, async_flights.ado(key, run))
+    finally:
+        exit_deadline(token)
+    if shared:
+        await in_request_context(request, user_id, track_event, 'request_coalesced', {'operation': operation})
+    return json_response(request, body, status)
+
+
+async def admission_response(request, user_id, error):
+    """Fast 429/503 for an LLM call that was refused rather than queued"""
+    await in_request_context(request, user_id, track_event, 'llm_admission_rejected', {
+        'status': error.status, 'reason': str(error)
+    })
+    return json_response(request, {
+        "error": "AI service is busy. Please try again shortly.",
+        "retry_after": error.retry_after
+    }, error.status, headers={'Retry-After': str(error.retry_after)})
+
+
+async def track_api_call(request, user_id, endpoint, start_time, status):
+    await in_request_context(request, user_id, track_event, 'api_call', {
+        'endpoint': endpoint,
+        'method': request.method,
+        'duration_ms': round((time.time() - start_time) * 1000, 2),
+        'status': status
+    })
+
+
+async def upload_document(request):
+    start_time = time.time()
+    user_id = await run_blocking(authenticate, request)
+    if not user_id:
+        return json_response(request, {"msg": "Missing or invalid Authorization header"}, 401)
+
+    try:
+        form = await request.form()
+        upload = form.get('file')
+        note_type = form.get('note_type', 'general')
+        if upload is None or not hasattr(upload, 'read'):
+            return json_response(request, {"error": "No file provided"}, 400)
+        if upload.filename == '':
+            return json_response(request, {"error": "No file selected"}, 400)
+
+        filename = upload.filename
+        file_bytes = await upload.read()
+
+        async def handler():
+            extracted_text, rejection = await in_request_context(
+                request, user_id, prepare_note_upload, user_id, filename, note_type, file_bytes
+            )
+            if rejection:
+                return rejection
+            lane = await in_request_context(request, user_id, llm_lane, user_id)
+            generated_notes = await generate_notes(extracted_text, filename, note_type, lane=lane, user_id=user_id)
+            return await in_request_context(
+                request, user_id, save_generated_note,
+                user_id, filename, note_type, len(file_bytes), extracted_text, generated_notes, start_time
+            )
+
+        digest = hashlib.sha256(file_bytes + note_type.encode('utf-8')).hexdigest()
+        response = await coalesced(request, user_id, 'notes_upload', digest, handler)
+        await track_api_call(request, user_id, 'upload_document', start_time, 'success')
+        return response
+    except AdmissionRejected as e:
+        return await admission_response(request, user_id, e)
+    except ClientDisconnected:
+        await track_api_call(request, user_id, 'upload_document', start_time, 'cancelled')
+        return Response(status_code=499)
+    except Exception as e:
+        print(f"Upload error: {e}")
+        await track_api_call(request, user_id, 'upload_document', start_time, 'error')
+        return json_response(request, {"error": f"Upload failed: {str(e)}"}, 500)
+
+
+async def generate_flashcards(request):
+    start_time = time.time()
+    user_id = await run_blocking(authenticate, request)
+    if not user_id:
+        return json_response(request, {"msg": "Missing or invalid Authorization header"}, 401)
+
+    try:
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        if not data:
+            return json_response(request, {"error": "Request data is required"}, 400)
+
+        note_id = data.get('note_id')
+        num_cards = parse_num_cards(data.get('num_cards'))
+        mode = extraction_mode(data.get('mode'))
+        if not note_id:
+            return json_response(request, {"error": "note_id is required"}, 400)
+        if num_cards is None:
+            return json_response(request, {"error": f"num_cards must be a whole number from 1 to {FLASHCARD_MAX_CARDS}"}, 400)
+
+        async def handler():
+            note, rejection = await in_request_context(request, user_id, load_note_for_flashcards, user_id, note_id)
+            if rejection:
+                return rejection
+            lane = await in_request_context(request, user_id, llm_lane, user_id)
+            try:
+                flashcards_data = await generate_flashcards_from_content(
+                    note['content'], note['title'], note['note_type'], num_cards, lane=lane, user_id=user_id, mode=mode
+                )
+            except AdmissionRejected:
+                raise
+            except Exception as ai_error:
+                print(f"AI generation error: {ai_error}")
+                return {"error": "AI service temporarily unavailable"}, 503
+            return await in_request_context(request, user_id, save_generated_flashcards, user_id, note_id, flashcards_data)
+
+        digest = flashcard_request_digest(data)
+        response = await coalesced(request, user_id, 'flashcards_generate', digest, handler)
+        await track_api_call(request, user_id, 'generate_flashcards', start_time, 'success')
+        return response
+    except AdmissionRejected as e:
+        return await admission_response(request, user_id, e)
+    except ClientDisconnected:
+        await track_api_call(request, user_id, 'generate_flashcards', start_time, 'cancelled')
+        return Response(status_code=499)
+    except Exception as e:
+        print(f"Generate flashcards error: {e}")
+        await track_api_call(request, user_id, 'generate_flashcards', start_time, 'error')
+        return json_response(request, {"error": f"Failed to generate flashcards: {str(e)}"}, 500)
+
+
+# POST-only routes: preflight OPTIONS and everything else fall through to Flask (and Flask-CORS)
+application = Starlette(routes=[
+    Route('/api/notes/upload', upload_document, methods=['POST']),
+    Route('/api/flashcards/generate', generate_flashcards, methods=['POST']),
+    Mount('/', app=WsgiToAsgi(flask_app)),
+], on_startup=[start_ollama_keeper])
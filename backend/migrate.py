@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for Impify
+
+Migrations are the numbered scripts in migrations/ (NNNN_name.py), each with a
+docstring saying what it does and an upgrade(server) function. They run in
+order, and each applied version is recorded in the schema_version table, so
+every deploy runs only what the database hasn't seen. Workers never touch the
+schema: run this once per deploy, before restarting them.
+
+MySQL commits DDL as it goes, so a migration can't be rolled back; write each
+one so that running it again (after a failure, or against a database that
+already has the change) is harmless - checkfirst=True, inspect before ALTER.
+
+Usage:
+  python migrate.py upgrade              # apply every pending migration
+  python migrate.py upgrade --to 3       # apply up to and including 0003
+  python migrate.py status               # applied and pending versions
+  python migrate.py stamp 6              # record up to 0006 as applied without running them
+  python migrate.py new add_widget_table # create the next numbered script
+"""
+
+import argparse
+import importlib.util
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+import pytz
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATIONS_DIR = os.path.join(BACKEND_DIR, "migrations")
+sys.path.insert(0, BACKEND_DIR)
+
+LOCK_NAME = "impify_schema_migrations"   # MySQL named lock: one migrator at a time across hosts
+LOCK_TIMEOUT = 60
+FILENAME = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+TEMPLATE = '''"""
+{description}
+"""
+
+
+def upgrade(server):
+    raise NotImplementedError
+'''
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    up = commands.add_parser("upgrade", help="apply pending migrations in order")
+    up.add_argument("--to", type=int, help="last version to apply (default: all)")
+    commands.add_parser("status", help="list applied and pending migrations")
+    stamp = commands.add_parser("stamp", help="record versions as applied without running them")
+    stamp.add_argument("version", type=int)
+    new = commands.add_parser("new", help="create the next numbered migration script")
+    new.add_argument("name", help="snake_case description, e.g. add_widget_table")
+    return parser.parse_args()
+
+
+def discover():
+    """[(version, name, path)] of the scripts in migrations/, in version order"""
+    found = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = FILENAME.match(filename)
+        if match:
+            found.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    found.sort()
+    versions = [version for version, _, _ in found]
+    duplicates = sorted({v for v in versions if versions.count(v) > 1})
+    if duplicates:
+        raise SystemExit(f"❌ Duplicate migration versions: {duplicates}")
+    return found
+
+
+def load(version, name, path):
+    spec = importlib.util.spec_from_file_location(f"migrations.m{version:04d}_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not callable(getattr(module, "upgrade", None)):
+        raise SystemExit(f"❌ {os.path.basename(path)} has no upgrade(server) function")
+    return module
+
+
+def summary(module):
+    lines = (module.__doc__ or "").strip().splitlines()
+    return lines[0] if lines else ""
+
+
+def version_table(server):
+    db = server.db
+    metadata = db.MetaData()
+    return db.Table(
+        "schema_version", metadata,
+        db.Column("version", db.Integer, primary_key=True, autoincrement=False),
+        db.Column("name", db.String(100), nullable=False),
+        db.Column("applied_at", db.DateTime, nullable=False),
+        db.Column("duration_ms", db.Integer, nullable=True),
+    )
+
+
+def applied_versions(server, table):
+    table.create(server.db.engine, checkfirst=True)
+    with server.db.engine.connect() as conn:
+        return {row.version: row for row in conn.execute(table.select())}
+
+
+def record(server, table, version, name, duration_ms=None):
+    with server.db.engine.begin() as conn:
+        conn.execute(table.insert().values(
+            version=version, name=name, duration_ms=duration_ms,
+            applied_at=datetime.now(pytz.timezone('Asia/Kolkata')).replace(tzinfo=None)
+        ))
+
+
+def upgrade(server, table, target=None):
+    done = applied_versions(server, table)
+    pending = [m for m in discover() if m[0] not in done and (target is None or m[0] <= target)]
+    if not pending:
+        print("✅ Schema is up to date")
+        return True
+    for version, name, path in pending:
+        module = load(version, name, path)
+        print(f"🚀 {version:04d} {name}: {summary(module)}")
+        start = time.monotonic()
+        try:
+            module.upgrade(server)
+            server.db.session.commit()
+        except Exception as e:
+            server.db.session.rollback()
+            print(f"❌ {version:04d} {name} failed: {e}")
+            import traceback
+            traceback.print_exc()
+            print("Fix the cause and rerun; applied migrations are not repeated.")
+            return False
+        duration_ms = int((time.monotonic() - start) * 1000)
+        record(server, table, version, name, duration_ms)
+        print(f"  ✅ Applied in {duration_ms} ms")
+    print(f"🎉 Applied {len(pending)} migration(s)")
+    return True
+
+
+def status(server, table):
+    done = applied_versions(server, table)
+    known = discover()
+    for version, name, _ in known:
+        row = done.get(version)
+        state = f"applied {row.applied_at:%Y-%m-%d %H:%M}" if row else "pending"
+        print(f"  {version:04d} {name:<40} {state}")
+    unknown = sorted(set(done) - {v for v, _, _ in known})
+    if unknown:
+        print(f"⚠️  Versions recorded in schema_version with no script here: {unknown}")
+    pending = sum(1 for v, _, _ in known if v not in done)
+    print(f"\n{pending} pending" if pending else "\nSchema is up to date")
+
+
+def stamp(server, table, target):
+    done = applied_versions(server, table)
+    for version, name, _ in discover():
+        if version <= target and version not in done:
+            record(server, table, version, name)
+            print(f"  📌 {version:04d} {name} marked as applied")
+
+
+def new(name):
+    if not re.fullmatch(r"[a-z0-9_]+", name):
+        raise SystemExit("❌ Use a snake_case name, e.g. add_widget_table")
+    known = discover()
+    version = (known[-1][0] + 1) if known else 1
+    path = os.path.join(MIGRATIONS_DIR, f"{version:04d}_{name}.py")
+    with open(path, "w") as f:
+        f.write(TEMPLATE.format(description=name.replace("_", " ").capitalize()))
+    print(f"📝 Created {os.path.relpath(path, BACKEND_DIR)}")
+
+
+def main():
+    args = parse_args()
+    if args.command == "new":
+        new(args.name)
+        return
+
+    import server
+
+    with server.app.app_context():
+        table = version_table(server)
+        with server.db.engine.connect() as lock:
+            if not lock.exec_driver_sql("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT)).scalar():
+                print(f"❌ Another migration holds the {LOCK_NAME} lock; try again when it finishes")
+                sys.exit(1)
+            try:
+                if args.command == "upgrade":
+                    ok = upgrade(server, table, args.to)
+                elif args.command == "stamp":
+                    stamp(server, table, args.version)
+                    ok = True
+                else:
+                    status(server, table)
+                    ok = True
+            finally:
+                lock.exec_driver_sql("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+Baseline: the model tables server.py used to create with db.create_all() at import
+
+On a database that already has them this does nothing; tables added to server.py
+after this baseline get their own migration.
+"""
+
+BASELINE_TABLES = [
+    "users", "notes", "note_sources", "consents", "analytics", "analytics_daily", "active_user_sketches",
+    "support_tickets", "community_posts", "community_likes", "notifications", "password_reset_tokens",
+    "flashcards", "flashcard_jobs", "flashcard_job_items", "regeneration_runs", "regeneration_items",
+    "user_stats", "user_daily_uploads", "subscriptions", "referrals", "global_settings",
+    "chat_sessions", "chat_logs", "token_packs", "purchase_history", "idempotency_keys",
+    "question_analyses", "question_analysis_bands",
+]
+
+
+def upgrade(server):
+    metadata = server.db.metadata
+    tables = [metadata.tables[name] for name in BASELINE_TABLES]
+    metadata.create_all(server.db.engine, tables=tables, checkfirst=True)
+    print(f"  - {len(tables)} model tables present")
@@ -0,0 +1,67 @@
+"""
+Folders: folders and folder_notes (no models; the folder routes use raw SQL)
+
+Replaces migrate_folders.py. Keys and foreign keys are only added where missing.
+"""
+
+from sqlalchemy import inspect
+
+CREATE_FOLDERS = """
+CREATE TABLE IF NOT EXISTS `folders` (
+  `id` varchar(36) NOT NULL,
+  `user_id` varchar(36) NOT NULL,
+  `name` varchar(100) NOT NULL,
+  `description` text DEFAULT NULL,
+  `color` varchar(7) DEFAULT '#3b82f6',
+  `created_at` datetime DEFAULT current_timestamp(),
+  `updated_at` datetime DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`id`),
+  KEY `user_id` (`user_id`),
+  CONSTRAINT `folders_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci
+"""
+
+CREATE_FOLDER_NOTES = """
+CREATE TABLE IF NOT EXISTS `folder_notes` (
+  `folder_id` varchar(36) NOT NULL,
+  `note_id` varchar(36) NOT NULL,
+  `added_at` datetime DEFAULT current_timestamp(),
+  PRIMARY KEY (`folder_id`,`note_id`),
+  KEY `note_id` (`note_id`),
+  CONSTRAINT `folder_notes_ibfk_1` FOREIGN KEY (`folder_id`) REFERENCES `folders` (`id`) ON DELETE CASCADE,
+  CONSTRAINT `folder_notes_ibfk_2` FOREIGN KEY (`note_id`) REFERENCES `notes` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci
+"""
+
+# Tables made by the old script without keys: (table, what is missing, ALTER to add it)
+REPAIRS = [
+    ("folders", "primary key", "ALTER TABLE `folders` ADD PRIMARY KEY (`id`), ADD KEY `user_id` (`user_id`)"),
+    ("folder_notes", "primary key",
+     "ALTER TABLE `folder_notes` ADD PRIMARY KEY (`folder_id`,`note_id`), ADD KEY `note_id` (`note_id`)"),
+    ("folders", "folders_ibfk_1",
+     "ALTER TABLE `folders` ADD CONSTRAINT `folders_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`)"),
+    ("folder_notes", "folder_notes_ibfk_1",
+     "ALTER TABLE `folder_notes` "
+     "ADD CONSTRAINT `folder_notes_ibfk_1` FOREIGN KEY (`folder_id`) REFERENCES `folders` (`id`) ON DELETE CASCADE, "
+     "ADD CONSTRAINT `folder_notes_ibfk_2` FOREIGN KEY (`note_id`) REFERENCES `notes` (`id`) ON DELETE CASCADE"),
+]
+
+
+def missing(inspector, table, what):
+    if what == "primary key":
+        return not inspector.get_pk_constraint(table).get("constrained_columns")
+    return what not in {fk.get("name") for fk in inspector.get_foreign_keys(table)}
+
+
+def upgrade(server):
+    engine = server.db.engine
+    with engine.begin() as conn:
+        conn.exec_driver_sql(CREATE_FOLDERS)
+        conn.exec_driver_sql(CREATE_FOLDER_NOTES)
+    print("  - folders and folder_notes present")
+    inspector = inspect(engine)
+    for table, what, statement in REPAIRS:
+        if missing(inspector, table, what):
+            print(f"  - Adding {what} to {table}...")
+            with engine.begin() as conn:
+                conn.exec_driver_sql(statement)
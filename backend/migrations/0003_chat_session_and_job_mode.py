@@ -0,0 +1,27 @@
+"""
+Columns added after their tables: chat_logs.session_id and flashcard_jobs.mode
+"""
+
+from sqlalchemy import inspect
+
+COLUMNS = [
+    ("chat_logs", "session_id", [
+        "ALTER TABLE chat_logs ADD COLUMN session_id VARCHAR(36) NULL",
+        "CREATE INDEX ix_chat_logs_session_id ON chat_logs (session_id)",
+    ]),
+    ("flashcard_jobs", "mode", [
+        "ALTER TABLE flashcard_jobs ADD COLUMN mode VARCHAR(10) DEFAULT 'ai'",
+    ]),
+]
+
+
+def upgrade(server):
+    engine = server.db.engine
+    inspector = inspect(engine)
+    for table, column, statements in COLUMNS:
+        if column in {c["name"] for c in inspector.get_columns(table)}:
+            continue
+        print(f"  - Adding {table}.{column} column...")
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.exec_driver_sql(statement)
@@ -0,0 +1,20 @@
+"""
+Default global settings row (id 1)
+"""
+
+from sqlalchemy import text
+
+# Plain SQL, not the model: later migrations add columns the model already declares
+INSERT_DEFAULTS = text(
+    "INSERT INTO global_settings (id, free_uploads_per_day, free_chats_per_day, daily_token_cap, streak_bonus_base) "
+    "VALUES (1, 5, 10, 200, 10)"
+)
+
+
+def upgrade(server):
+    with server.db.engine.begin() as conn:
+        if conn.execute(text("SELECT COUNT(*) FROM global_settings")).scalar():
+            print("  ℹ️  Global settings already exist")
+            return
+        conn.execute(INSERT_DEFAULTS)
+    print("  - Default global settings inserted")
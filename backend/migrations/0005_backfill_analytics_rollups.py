@@ -0,0 +1,15 @@
+"""
+Backfill analytics_daily and active_user_sketches from the raw analytics events
+
+The analytics writer keeps both up to date from then on.
+"""
+
+
+def upgrade(server):
+    oldest = server.db.session.query(server.db.func.min(server.Analytics.timestamp)).scalar()
+    if server.AnalyticsDaily.query.first() or not oldest:
+        print("  ℹ️  Nothing to backfill")
+        return
+    # No rollups yet, so nothing archived to protect: start from the oldest raw event
+    events = server.rebuild_analytics_daily(since=oldest.date())
+    print(f"  - Rolled up {events} events")
@@ -0,0 +1,24 @@
+"""
+Composite indexes behind the hot queries (check them with test_query_plans.py)
+
+Tables created from the models already have them; older tables get the missing ones.
+"""
+
+from sqlalchemy import inspect
+
+
+def upgrade(server):
+    engine = server.db.engine
+    inspector = inspect(engine)
+    models = [server.Note, server.Flashcard, server.ChatLog, server.Notification,
+              server.Analytics, server.AnalyticsDaily, server.CommunityLike]
+    created = 0
+    for model in models:
+        table = model.__table__
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            if index.name not in existing:
+                print(f"  - Creating index {index.name} on {table.name}...")
+                index.create(engine)
+                created += 1
+    print(f"  - {created} indexes created" if created else "  ℹ️  All indexes already exist")
@@ -0,0 +1,13 @@
+"""
+Token ledger: token_ledger and token_balance_snapshots
+
+Balances from before the ledger have no entries; the first reconcile_tokens.py
+snapshot records them as each user's opening balance.
+"""
+
+
+def upgrade(server):
+    engine = server.db.engine
+    for model in (server.TokenLedger, server.TokenBalanceSnapshot):
+        model.__table__.create(engine, checkfirst=True)
+        print(f"  - {model.__tablename__} present")
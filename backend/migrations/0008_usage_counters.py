@@ -0,0 +1,35 @@
+"""
+Usage counters: usage_counters, backfilled from notes (uploads) and chat_logs (chats)
+
+Counts only ever rise to the backfilled value, so counters the app already
+bumped are kept if this runs after the new code is live.
+"""
+
+from sqlalchemy import text
+
+SOURCES = [("upload", "notes", "created_at"), ("chat", "chat_logs", "timestamp")]
+
+PERIODS = [
+    ("d", "DATE({column})"),
+    ("m", "DATE_SUB(DATE({column}), INTERVAL DAYOFMONTH({column}) - 1 DAY)"),
+]
+
+BACKFILL = """
+INSERT INTO usage_counters (user_id, action, period, period_start, count)
+SELECT user_id, :action, :period, {start} AS period_start, COUNT(*)
+FROM {table} WHERE {column} IS NOT NULL
+GROUP BY user_id, period_start
+ON DUPLICATE KEY UPDATE count = GREATEST(count, VALUES(count))
+"""
+
+
+def upgrade(server):
+    engine = server.db.engine
+    server.UsageCounter.__table__.create(engine, checkfirst=True)
+    print("  - usage_counters present")
+    for action, table, column in SOURCES:
+        for period, start in PERIODS:
+            statement = BACKFILL.format(start=start.format(column=column), table=table, column=column)
+            with engine.begin() as conn:
+                rows = conn.execute(text(statement), {"action": action, "period": period}).rowcount
+            print(f"  - Backfilled {action} per {'day' if period == 'd' else 'month'} from {table} ({rows} rows affected)")
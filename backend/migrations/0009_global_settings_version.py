@@ -0,0 +1,15 @@
+"""
+global_settings.version: bumped by every settings update so workers know to reload
+"""
+
+from sqlalchemy import inspect
+
+
+def upgrade(server):
+    engine = server.db.engine
+    if "version" in {c["name"] for c in inspect(engine).get_columns("global_settings")}:
+        print("  ℹ️  global_settings.version already exists")
+        return
+    print("  - Adding global_settings.version column...")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE global_settings ADD COLUMN version INT NOT NULL DEFAULT 1")
@@ -0,0 +1,30 @@
+"""
+Recompute question_analyses signatures and band keys: MinHash now shingles singular content words
+
+The stored normalized text and question_hash are unchanged, so exact matches keep working throughout.
+"""
+
+from services.qcache import band_keys, minhash, pack_signature
+
+BATCH = 500
+
+
+def upgrade(server):
+    db = server.db
+    QuestionAnalysis, QuestionAnalysisBand = server.QuestionAnalysis, server.QuestionAnalysisBand
+    last_id, updated = 0, 0
+    while True:
+        rows = QuestionAnalysis.query.filter(QuestionAnalysis.id > last_id).order_by(QuestionAnalysis.id).limit(BATCH).all()
+        if not rows:
+            break
+        ids = [row.id for row in rows]
+        QuestionAnalysisBand.query.filter(QuestionAnalysisBand.analysis_id.in_(ids)).delete(synchronize_session=False)
+        bands = []
+        for row in rows:
+            signature = minhash(row.normalized)
+            row.signature = pack_signature(signature)
+            bands += [{'band_key': key, 'analysis_id': row.id} for key in band_keys(signature)]
+        db.session.bulk_insert_mappings(QuestionAnalysisBand, bands)
+        db.session.commit()
+        last_id, updated = ids[-1], updated + len(rows)
+    print(f"  - Re-signed {updated} cached question analyses")
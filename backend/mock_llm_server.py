@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Mock LLM provider for offline load and latency testing
+
+Speaks enough of both upstream protocols for the backend:
+  - OpenAI   POST /v1/chat/completions  (stream=true -> SSE)
+  - Ollama   POST /api/chat, /api/generate  (NDJSON stream unless "stream": false)
+
+Point the backend at it:
+  OPENAI_API_KEY=mock OPENAI_BASE_URL=http://localhost:11500/v1 OLLAMA_URL=http://localhost:11500
+
+Usage:
+  python mock_llm_server.py --latency lognormal --latency-ms 800 --tokens-per-sec 60 --error-rate 0.05
+Every flag can also be set as MOCK_LLM_<FLAG> (e.g. MOCK_LLM_ERROR_RATE=0.1).
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FILLER = (
+    "photosynthesis converts light energy into chemical energy stored in glucose while the "
+    "calvin cycle fixes carbon dioxide using atp and nadph produced by the light reactions"
+).split()
+
+
+def env(name, default):
+    return os.environ.get(f"MOCK_LLM_{name.upper()}", default)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mock OpenAI/Ollama server for load testing")
+    parser.add_argument("--host", default=env("host", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(env("port", "11500")))
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default=env("latency", "lognormal"),
+                        help="distribution of time-to-first-token")
+    parser.add_argument("--latency-ms", type=float, default=float(env("latency_ms", "500")),
+                        help="median time-to-first-token (uniform: 0..2x this)")
+    parser.add_argument("--latency-sigma", type=float, default=float(env("latency_sigma", "0.5")),
+                        help="lognormal shape; 0.5 gives a p95 of ~2.3x the median")
+    parser.add_argument("--tokens-per-sec", type=float, default=float(env("tokens_per_sec", "50")),
+                        help="generation speed after the first token (0 = instant)")
+    parser.add_argument("--completion-tokens", type=int, default=int(env("completion_tokens", "300")),
+                        help="length of free-text answers")
+    parser.add_argument("--error-rate", type=float, default=float(env("error_rate", "0")),
+                        help="fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=int(env("error_status", "500")))
+    parser.add_argument("--hang-rate", type=float, default=float(env("hang_rate", "0")),
+                        help="fraction of requests that stall for --hang-seconds (client timeouts)")
+    parser.add_argument("--hang-seconds", type=float, default=float(env("hang_seconds", "300")))
+    parser.add_argument("--seed", type=int, default=int(env("seed", "0")) or None)
+    return parser.parse_args()
+
+
+def count_tokens(text):
+    return max(1, len(text) // 4) if text else 0
+
+
+def words_to_tokens(words):
+    """Split text into stream pieces of roughly one token each"""
+    return [w + " " for w in words]
+
+
+def flashcards_answer(prompt):
+    match = re.search(r"Create (\d+)", prompt)
+    num_cards = int(match.group(1)) if match else 8
+    title = re.search(r"study material: (.+)", prompt)
+    topic = title.group(1).strip() if title else "the topic"
+    cards = [{
+        "question": f"Mock question {i + 1} about {topic}?",
+        "answer": f"Mock answer {i + 1}: " + " ".join(random.sample(FILLER, 8))
+    } for i in range(num_cards)]
+    return json.dumps(cards, indent=2)
+
+
+def text_answer(prompt, completion_tokens):
+    words = ["## Summary\n"] + [random.choice(FILLER) for _ in range(completion_tokens)]
+    return " ".join(words)
+
+
+def make_answer(messages, completion_tokens):
+    prompt = "\n".join(m.get("content", "") for m in messages)
+    if "JSON" in prompt and "flashcard" in prompt.lower():
+        return flashcards_answer(prompt)
+    return text_answer(prompt, completion_tokens)
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "errors": 0, "hangs": 0, "streams": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def incr(self, key, n=1):
+        with self.lock:
+            self.counts[key] += n
+            if key == "in_flight":
+                self.counts["max_in_flight"] = max(self.counts["max_in_flight"], self.counts["in_flight"])
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None
+    stats = Stats()
+
+    def log_message(self, fmt, *args):
+        pass  # keep load tests quiet
+
+    # ---- helpers ----
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def start_stream(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+    def first_token_delay(self):
+        cfg = self.config
+        median = cfg.latency_ms / 1000
+        if cfg.latency == "fixed":
+            return median
+        if cfg.latency == "uniform":
+            return random.uniform(0, 2 * median)
+        return random.lognormvariate(0, cfg.latency_sigma) * median
+
+    def token_delay(self):
+        return 1 / self.config.tokens_per_sec if self.config.tokens_per_sec > 0 else 0
+
+    def inject_fault(self, openai_style):
+        """Returns True if the request was answered with an injected fault"""
+        cfg = self.config
+        if cfg.hang_rate and random.random() < cfg.hang_rate:
+            self.stats.incr("hangs")
+            time.sleep(cfg.hang_seconds)
+        if cfg.error_rate and random.random() < cfg.error_rate:
+            self.stats.incr("errors")
+            message = f"Injected error {cfg.error_status}"
+            payload = {"error": {"message": message, "type": "server_error"}} if openai_style else {"error": message}
+            self.send_json(cfg.error_status, payload)
+            return True
+        return False
+
+    # ---- routes ----
+
+    def do_GET(self):
+        if self.path in ("/v1/models", "/models"):
+            self.send_json(200, {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model"},
+                                                            {"id": "gpt-4o", "object": "model"}]})
+        elif self.path == "/api/tags":
+            self.send_json(200, {"models": [{"name": "llama3:8b", "model": "llama3:8b"}]})
+        elif self.path == "/stats":
+            self.send_json(200, self.stats.snapshot())
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        routes = {
+            "/v1/chat/completions": self.openai_chat,
+            "/chat/completions": self.openai_chat,
+            "/api/chat": self.ollama_chat,
+            "/api/generate": self.ollama_generate,
+        }
+        handler = routes.get(self.path)
+        if not handler:
+            self.send_json(404, {"error": "not found"})
+            return
+        self.stats.incr("requests")
+        self.stats.incr("in_flight")
+        try:
+            handler(self.read_json())
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client went away (timeout or cancelled hedge)
+        finally:
+            self.stats.incr("in_flight", -1)
+
+    def openai_chat(self, body):
+        if self.inject_fault(openai_style=True):
+            return
+        model = body.get("model", "gpt-4o-mini")
+        messages = body.get("messages", [])
+        answer = make_answer(messages, self.config.completion_tokens)
+        pieces = words_to_tokens(answer.split(" "))
+        usage = {
+            "prompt_tokens": sum(count_tokens(m.get("content", "")) for m in messages),
+            "completion_tokens": len(pieces),
+            "prompt_tokens_details": {"cached_tokens": 0},
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        time.sleep(self.first_token_delay())
+        if not body.get("stream"):
+            time.sleep(self.token_delay() * len(pieces))
+            self.send_json(200, {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        self.stats.incr("streams")
+        self.start_stream("text/event-stream")
+
+        def event(delta, finish_reason=None, extra=None):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            chunk.update(extra or {})
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        event({"role": "assistant", "content": ""})
+        for piece in pieces:
+            event({"content": piece})
+            time.sleep(self.token_delay())
+        event({}, "stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            self.wfile.write(f"data: {json.dumps({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model, 'choices': [], 'usage': usage})}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def ollama_reply(self, body, messages, make_chunk):
+        """Shared Ollama flow; make_chunk(piece) builds the per-chunk payload"""
+        if self.inject_fault(openai_style=False):
+            return
+        model = body.get("model", "llama3:8b")
+        answer = make_answer(messages, self.config.completion_tokens)
+        pieces = words_to_tokens(answer.split(" "))
+        started = time.time()
+        first = self.first_token_delay()
+        time.sleep(first)
+
+        def final(extra):
+            elapsed = time.time() - started
+            payload = {
+                "model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "done": True,
+                "done_reason": "stop",
+                "total_duration": int(elapsed * 1e9), "load_duration": 0,
+                "prompt_eval_count": sum(count_tokens(m.get("content", "")) for m in messages),
+                "prompt_eval_duration": int(first * 1e9),
+                "eval_count": len(pieces), "eval_duration": int((elapsed - first) * 1e9),
+            }
+            payload.update(extra)
+            return payload
+
+        if body.get("stream") is False:
+            time.sleep(self.token_delay() * len(pieces))
+            self.send_json(200, final(make_chunk(answer)))
+            return
+
+        self.stats.incr("streams")
+        self.start_stream("application/x-ndjson")
+        for piece in pieces:
+            chunk = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "done": False}
+            chunk.update(make_chunk(piece))
+            self.wfile.write((json.dumps(chunk) + "\n").encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.token_delay())
+        self.wfile.write((json.dumps(final(make_chunk(""))) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def ollama_chat(self, body):
+        self.ollama_reply(body, body.get("messages", []),
+                          lambda piece: {"message": {"role": "assistant", "content": piece}})
+
+    def ollama_generate(self, body):
+        messages = [{"role": "system", "content": body.get("system", "")}, {"role": "user", "content": body.get("prompt", "")}]
+        self.ollama_reply(body, messages, lambda piece: {"response": piece})
+
+
+def main():
+    args = parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+    MockHandler.config = args
+    server = ThreadingHTTPServer((args.host, args.port), MockHandler)
+    server.daemon_threads = True
+    print(f"🧪 Mock LLM server on http://{args.host}:{args.port} "
+          f"(ttft {args.latency} ~{args.latency_ms:.0f}ms, {args.tokens_per_sec:g} tok/s, "
+          f"errors {args.error_rate:.0%} -> {args.error_status}, hangs {args.hang_rate:.0%})")
+    print(f"   OPENAI_BASE_URL=http://{args.host}:{args.port}/v1  OLLAMA_URL=http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping mock LLM server")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Token balance snapshots and ledger reconciliation
+
+Every change to user_stats.tokens commits together with its token_ledger row, so
+for each user:
+
+  tokens = snapshot balance + sum(ledger deltas after the snapshot's ledger_id)
+
+verify checks that against the last snapshots and lists users whose balance moved
+without a ledger entry (a write that bypassed change_tokens). snapshot records the
+current balances, which also bounds how much ledger a later check has to read.
+Run from cron, e.g. nightly:
+
+  python reconcile_tokens.py verify && python reconcile_tokens.py snapshot
+
+Each batch of users is read in one transaction, so a balance and the ledger
+position stored with it are always consistent. Ledger ids are allocated at insert
+but become visible at commit, so a row can appear after a higher id has; snapshot
+skips users with ledger rows newer than --settle seconds (they keep their previous
+snapshot until the next run), so no late-committing row falls behind the stored id.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytz
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SNAPSHOT_BATCH = text(
+    "SELECT s.user_id, COALESCE(s.tokens, 0) AS balance, "
+    "COALESCE((SELECT MAX(l.id) FROM token_ledger l WHERE l.user_id = s.user_id), 0) AS ledger_id "
+    "FROM user_stats s WHERE s.user_id > :after "
+    "AND NOT EXISTS (SELECT 1 FROM token_ledger r WHERE r.user_id = s.user_id AND r.created_at > :settled) "
+    "ORDER BY s.user_id LIMIT :batch"
+)
+
+VERIFY_BATCH = text(
+    "SELECT s.user_id, COALESCE(s.tokens, 0) AS tokens, b.balance, b.ledger_id, "
+    "COALESCE((SELECT SUM(l.delta) FROM token_ledger l WHERE l.user_id = s.user_id AND l.id > b.ledger_id), 0) AS since "
+    "FROM user_stats s JOIN token_balance_snapshots b ON b.user_id = s.user_id "
+    "WHERE s.user_id > :after ORDER BY s.user_id LIMIT :batch"
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Snapshot token balances and check them against the ledger")
+    parser.add_argument("command", choices=["snapshot", "verify"])
+    parser.add_argument("--batch-size", type=int, default=1000, help="users per transaction")
+    parser.add_argument("--show", type=int, default=20, help="drifted users listed by verify")
+    parser.add_argument("--settle", type=int, default=300,
+                        help="snapshot skips users with ledger rows newer than this many seconds")
+    return parser.parse_args()
+
+
+def batches(engine, statement, batch_size, **params):
+    """Yield (connection, rows) per batch of users, each inside its own transaction"""
+    after = ""
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(statement, dict(params, after=after, batch=batch_size)).mappings().all()
+            if not rows:
+                return
+            yield conn, rows
+        after = rows[-1]["user_id"]
+
+
+def snapshot(server, batch_size, settle):
+    from sqlalchemy.dialects.mysql import insert as mysql_insert
+    table = server.TokenBalanceSnapshot.__table__
+    now = datetime.now(pytz.timezone('Asia/Kolkata')).replace(tzinfo=None)
+    taken = 0
+    for conn, rows in batches(server.db.engine, SNAPSHOT_BATCH, batch_size, settled=now - timedelta(seconds=settle)):
+        statement = mysql_insert(table).values([
+            {"user_id": r["user_id"], "balance": r["balance"], "ledger_id": r["ledger_id"], "taken_at": now}
+            for r in rows
+        ])
+        conn.execute(statement.on_duplicate_key_update(
+            balance=statement.inserted.balance, ledger_id=statement.inserted.ledger_id,
+            taken_at=statement.inserted.taken_at
+        ))
+        taken += len(rows)
+    print(f"📸 Snapshot of {taken} balances taken")
+    return taken
+
+
+def verify(server, batch_size, show):
+    checked, drifted = 0, []
+    for _, rows in batches(server.db.engine, VERIFY_BATCH, batch_size):
+        for r in rows:
+            expected = r["balance"] + int(r["since"])
+            if r["tokens"] != expected:
+                drifted.append((r["user_id"], r["tokens"], expected))
+        checked += len(rows)
+    for user_id, tokens, expected in drifted[:show]:
+        print(f"❌ {user_id}: balance {tokens}, ledger says {expected} ({tokens - expected:+d})")
+    if drifted:
+        print(f"\n{len(drifted)} of {checked} balances changed outside the ledger")
+    else:
+        print(f"✅ {checked} balances match their ledger")
+    return not drifted
+
+
+def main():
+    args = parse_args()
+
+    import server
+
+    with server.app.app_context():
+        if args.command == "snapshot":
+            snapshot(server, args.batch_size, args.settle)
+        elif not verify(server, args.batch_size, args.show):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Bulk note regeneration with checkpointing
+
+Re-runs note generation for existing notes after a prompt or model change, with
+bounded concurrency against one provider. Every selected note gets a row in
+regeneration_items, so an interrupted run resumes where it stopped; results are
+written in batched transactions (a crash redoes at most one batch).
+
+Usage:
+  python regenerate_notes.py start --note-type question_paper --since 2025-01-01 --provider openai --model gpt-4o-mini
+  python regenerate_notes.py start --dry-run --mock-url http://localhost:11500 --limit 50
+  python regenerate_notes.py resume <run_id> [--retry-failed]
+  python regenerate_notes.py status <run_id>
+  python regenerate_notes.py revert <run_id>
+
+Source text comes from note_sources. Notes uploaded before that table existed
+are matched against training/log.jsonl (user, file name and generated output)
+and backfilled; notes with neither are skipped.
+Dry runs store the new output on the item and leave notes untouched.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+import pytz
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.deadline import Deadline, aretry
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Regenerate existing notes with the current prompts/model")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def provider_flags(p):
+        p.add_argument("--concurrency", type=int, default=4, help="notes generating at once")
+        p.add_argument("--batch-size", type=int, default=20, help="results per DB transaction")
+        p.add_argument("--timeout", type=float, default=180, help="seconds per note, retries included")
+        p.add_argument("--mock-url", help="send every LLM call to a mock server (mock_llm_server.py)")
+        p.add_argument("--training-log", default="training/log.jsonl", help="fallback source text for older notes")
+
+    start = commands.add_parser("start", help="select notes and start a new run")
+    start.add_argument("--note-type", choices=["general", "question_paper"])
+    start.add_argument("--user", help="only this user's notes")
+    start.add_argument("--since", help="created on/after YYYY-MM-DD")
+    start.add_argument("--until", help="created before YYYY-MM-DD")
+    start.add_argument("--note-id", action="append", default=[], help="repeatable")
+    start.add_argument("--limit", type=int)
+    start.add_argument("--provider", choices=["openai", "ollama"], default="openai")
+    start.add_argument("--model", help="defaults to OPENAI_MODEL / OLLAMA_MODEL")
+    start.add_argument("--dry-run", action="store_true", help="keep outputs on the run, do not touch notes")
+    provider_flags(start)
+
+    resume = commands.add_parser("resume", help="continue an interrupted run")
+    resume.add_argument("run_id")
+    resume.add_argument("--retry-failed", action="store_true")
+    provider_flags(resume)
+
+    status = commands.add_parser("status", help="progress, latency and failures of a run")
+    status.add_argument("run_id")
+
+    revert = commands.add_parser("revert", help="restore the previous content of a run's notes")
+    revert.add_argument("run_id")
+    return parser.parse_args()
+
+
+def configure_mock(mock_url):
+    """Point both providers at a mock server. Must run before server is imported (its OpenAI client reads the URL)."""
+    if mock_url:
+        os.environ["OPENAI_BASE_URL"] = mock_url.rstrip("/") + "/v1"
+        os.environ["OLLAMA_URL"] = mock_url.rstrip("/")
+        os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+class SourceLookup:
+    """Extracted text for a note: note_sources first, then the training log"""
+    def __init__(self, server, training_log):
+        self.server = server
+        self.log = {}
+        if training_log and os.path.exists(training_log):
+            with open(training_log, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.log[self.key(rec.get("user_id"), rec.get("source"), rec.get("output"))] = rec.get("input")
+            print(f"📚 Indexed {len(self.log)} training log entries")
+
+    @staticmethod
+    def key(user_id, filename, output):
+        return user_id, filename, hashlib.sha256((output or "").encode("utf-8")).hexdigest()
+
+    def get(self, note):
+        """(text, needs_backfill)"""
+        source = self.server.NoteSource.query.get(note.id)
+        if source:
+            return source.text, False
+        text = self.log.get(self.key(note.user_id, note.original_filename, note.content))
+        return text, bool(text)
+
+
+class Runner:
+    def __init__(self, server, run, client, args):
+        self.server = server
+        self.db = server.db
+        self.run = run
+        self.client = client
+        self.args = args
+        self.sources = SourceLookup(server, args.training_log)
+        self.pending = []    # finished items not yet written
+        self.latencies = []
+        self.errors = Counter()
+        self.finished = 0
+
+    async def regenerate(self, item_id, note_id, semaphore, total):
+        server = self.server
+        async with semaphore:
+            note = server.Note.query.get(note_id)
+            if not note:
+                return self.finish(item_id, note_id, note, "skipped", error="note deleted", total=total)
+            text, backfill = self.sources.get(note)
+            if not text:
+                return self.finish(item_id, note_id, note, "skipped", error="no source text", total=total)
+
+            prompt = server.notes_prompt(text, note.original_filename or note.title, note.note_type)
+            deadline = Deadline(self.args.timeout)
+            start = time.monotonic()
+            try:
+                content = await aretry(
+                    lambda: self.client.achat(server.NOTES_SYSTEM_MESSAGE, prompt, deadline=deadline), deadline
+                )
+                if not content or not content.strip():
+                    raise ValueError("empty response")
+            except Exception as e:
+                latency = round((time.monotonic() - start) * 1000)
+                return self.finish(item_id, note_id, note, "failed", latency=latency, error=f"{type(e).__name__}: {e}", total=total)
+            latency = round((time.monotonic() - start) * 1000)
+            self.finish(item_id, note_id, note, "done", latency=latency, content=content,
+                        source=text if backfill else None, total=total)
+
+    def finish(self, item_id, note_id, note, status, latency=None, content=None, error=None, source=None, total=0):
+        self.finished += 1
+        if latency is not None and status == "done":
+            self.latencies.append(latency)
+        if error:
+            self.errors[error[:80]] += 1
+        icon = {"done": "✅", "failed": "❌", "skipped": "⏭️"}[status]
+        print(f"{icon} [{self.finished}/{total}] {note_id} {status}"
+              + (f" {latency}ms" if latency is not None else "") + (f" — {error}" if error else ""))
+        self.pending.append({
+            "item_id": item_id, "note_id": note_id, "status": status, "latency": latency,
+            "content": content, "previous": note.content if note and content else None,
+            "error": error, "source": source
+        })
+        if len(self.pending) >= self.args.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write finished items (and, unless dry-run, the new note content) in one transaction"""
+        if not self.pending:
+            return
+        server, db = self.server, self.db
+        batch, self.pending = self.pending, []
+        now = datetime.now(pytz.timezone('Asia/Kolkata'))
+        try:
+            if not self.run.dry_run:
+                db.session.bulk_update_mappings(server.Note, [
+                    {"id": r["note_id"], "content": r["content"], "updated_at": now}
+                    for r in batch if r["status"] == "done"
+                ])
+            for r in batch:
+                if r["source"]:
+                    db.session.merge(server.NoteSource(note_id=r["note_id"], text=r["source"]))
+            db.session.bulk_update_mappings(server.RegenerationItem, [{
+                "id": r["item_id"],
+                "status": r["status"],
+                "latency_ms": r["latency"],
+                "error": (r["error"] or "")[:255] or None,
+                "previous_content": None if self.run.dry_run else r["previous"],
+                "output": r["content"] if self.run.dry_run else None,
+                "updated_at": now
+            } for r in batch])
+            refresh_counters(server, self.run.id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            self.pending = batch + self.pending  # retried by the next flush
+            raise
+
+    async def process(self, items):
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        await asyncio.gather(*[self.regenerate(item_id, note_id, semaphore, len(items)) for item_id, note_id in items])
+
+
+def refresh_counters(server, run_id):
+    Item = server.RegenerationItem
+    counts = dict(server.db.session.query(Item.status, server.db.func.count(Item.id))
+                  .filter(Item.run_id == run_id).group_by(Item.status).all())
+    server.RegenerationRun.query.filter_by(id=run_id).update({
+        "done": counts.get("done", 0),
+        "failed": counts.get("failed", 0),
+        "skipped": counts.get("skipped", 0)
+    }, synchronize_session=False)
+
+
+def select_notes(server, args):
+    query = server.Note.query
+    if args.note_type:
+        query = query.filter(server.Note.note_type == args.note_type)
+    if args.user:
+        query = query.filter(server.Note.user_id == args.user)
+    if args.since:
+        query = query.filter(server.Note.created_at >= datetime.strptime(args.since, "%Y-%m-%d"))
+    if args.until:
+        query = query.filter(server.Note.created_at < datetime.strptime(args.until, "%Y-%m-%d"))
+    if args.note_id:
+        query = query.filter(server.Note.id.in_(args.note_id))
+    query = query.with_entities(server.Note.id).order_by(server.Note.created_at)
+    if args.limit:
+        query = query.limit(args.limit)
+    return [row[0] for row in query.all()]
+
+
+def make_client(server, provider, model):
+    client = server.LLMClient(provider=provider)
+    if model:
+        client.model = model
+    return client
+
+
+def execute(server, run, args, statuses):
+    Item = server.RegenerationItem
+    items = [(item.id, item.note_id) for item in
+             Item.query.filter(Item.run_id == run.id, Item.status.in_(statuses)).order_by(Item.id).all()]
+    if not items:
+        print("Nothing to do.")
+        return
+    client = make_client(server, run.provider, run.model)
+    print(f"🚀 Run {run.id}: {len(items)} notes via {run.provider}:{client.model}"
+          f" (concurrency {args.concurrency}{', dry run' if run.dry_run else ''})")
+
+    runner = Runner(server, run, client, args)
+    started = time.monotonic()
+    run.status = "running"
+    server.db.session.commit()
+    try:
+        asyncio.run(runner.process(items))
+        run.status = "done"
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("\n⏸️ Interrupted; resume with: python regenerate_notes.py resume", run.id)
+        run.status = "interrupted"
+    finally:
+        runner.flush()
+        if run.status == "done":
+            run.finished_at = datetime.now(pytz.timezone('Asia/Kolkata'))
+        server.db.session.commit()
+
+    elapsed = time.monotonic() - started
+    print(f"\n📋 {runner.finished} notes in {elapsed:.1f}s")
+    report(server, run.id, runner.latencies, runner.errors)
+
+
+def report(server, run_id, latencies=None, errors=None):
+    Item = server.RegenerationItem
+    run = server.RegenerationRun.query.get(run_id)
+    refresh_counters(server, run_id)
+    server.db.session.commit()
+    server.db.session.refresh(run)
+    pending = Item.query.filter(Item.run_id == run_id, Item.status == "pending").count()
+    print(f"Run {run.id} [{run.status}] {run.provider}:{run.model or 'default'}{' (dry run)' if run.dry_run else ''}")
+    print(f"  total {run.total}  done {run.done}  failed {run.failed}  skipped {run.skipped}  pending {pending}")
+
+    if latencies is None:
+        latencies = [row[0] for row in server.db.session.query(Item.latency_ms)
+                     .filter(Item.run_id == run_id, Item.status == "done", Item.latency_ms.isnot(None)).all()]
+    if latencies:
+        print(f"  latency ms  p50 {percentile(latencies, 0.5)}  p95 {percentile(latencies, 0.95)}  max {max(latencies)}")
+
+    if errors is None:
+        errors = Counter(row[0] for row in server.db.session.query(Item.error)
+                         .filter(Item.run_id == run_id, Item.status.in_(["failed", "skipped"])).all())
+    for error, count in errors.most_common(5):
+        print(f"  {count:>4} × {error}")
+
+
+def revert(server, run_id):
+    Item = server.RegenerationItem
+    run = server.RegenerationRun.query.get(run_id)
+    if run.dry_run:
+        print("Dry runs never changed any notes.")
+        return
+    items = Item.query.filter(Item.run_id == run_id, Item.status == "done", Item.previous_content.isnot(None)).all()
+    now = datetime.now(pytz.timezone('Asia/Kolkata'))
+    for start in range(0, len(items), 100):
+        batch = items[start:start + 100]
+        server.db.session.bulk_update_mappings(server.Note, [
+            {"id": item.note_id, "content": item.previous_content, "updated_at": now} for item in batch
+        ])
+        for item in batch:
+            item.status = "reverted"
+        server.db.session.commit()
+    print(f"↩️ Restored {len(items)} notes from run {run_id}")
+
+
+def main():
+    args = parse_args()
+    configure_mock(getattr(args, "mock_url", None))
+
+    import server
+
+    with server.app.app_context():
+        if args.command == "start":
+            note_ids = select_notes(server, args)
+            if not note_ids:
+                print("No notes match the filters.")
+                return
+            filters = {k: getattr(args, k) for k in ("note_type", "user", "since", "until", "note_id", "limit")}
+            run = server.RegenerationRun(
+                id=str(uuid.uuid4()), filters=json.dumps(filters), provider=args.provider,
+                model=args.model, dry_run=args.dry_run, total=len(note_ids)
+            )
+            server.db.session.add(run)
+            server.db.session.flush()
+            server.db.session.bulk_insert_mappings(server.RegenerationItem, [
+                {"run_id": run.id, "note_id": note_id, "status": "pending"} for note_id in note_ids
+            ])
+            server.db.session.commit()
+            execute(server, run, args, ["pending"])
+
+        elif args.command == "resume":
+            run = server.RegenerationRun.query.get(args.run_id)
+            if not run:
+                sys.exit(f"Run {args.run_id} not found")
+            execute(server, run, args, ["pending", "failed"] if args.retry_failed else ["pending"])
+
+        elif args.command == "status":
+            if not server.RegenerationRun.query.get(args.run_id):
+                sys.exit(f"Run {args.run_id} not found")
+            report(server, args.run_id)
+
+        elif args.command == "revert":
+            if not server.RegenerationRun.query.get(args.run_id):
+                sys.exit(f"Run {args.run_id} not found")
+            revert(server, args.run_id)
+
+
+if __name__ == "__main__":
+    main()
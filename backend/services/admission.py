@@ -0,0 +1,241 @@
+# services/admission.py
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+from services.ollama import MAX_CONCURRENCY as OLLAMA_MAX_CONCURRENCY
+
+LANES = ("premium", "paid", "free")
+LANE_WEIGHTS = {
+    "premium": int(os.getenv("LLM_LANE_WEIGHT_PREMIUM", "6")),
+    "paid": int(os.getenv("LLM_LANE_WEIGHT_PAID", "3")),
+    "free": int(os.getenv("LLM_LANE_WEIGHT_FREE", "1")),
+}
+DEFAULT_CAPACITY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))          # concurrent calls per provider
+PER_USER_LIMIT = int(os.getenv("LLM_PER_USER_CONCURRENCY", "2"))       # running + queued calls per user
+MAX_QUEUE_WAIT = float(os.getenv("LLM_MAX_QUEUE_WAIT", "20"))           # seconds before a queued call gives up
+
+
+def _provider_capacities():
+    """LLM_PROVIDER_CONCURRENCY=openai=16,ollama=2 overrides DEFAULT_CAPACITY per provider.
+
+    Local generations are CPU-bound, so ollama defaults to OLLAMA_MAX_CONCURRENCY (the CPU count).
+    """
+    capacities = {"ollama": OLLAMA_MAX_CONCURRENCY}
+    for item in os.getenv("LLM_PROVIDER_CONCURRENCY", "").split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip().isdigit():
+            capacities[name.strip()] = int(value)
+    return capacities
+
+
+class AdmissionRejected(Exception):
+    """Raised instead of queueing a call that would exceed its limits or its deadline."""
+    def __init__(self, message, status=503, retry_after=5):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(True)
+
+
+class _Waiter:
+    __slots__ = ("lane", "user_id", "enqueued_at", "granted", "event", "loop", "future")
+
+    def __init__(self, lane, user_id, loop=None):
+        self.lane = lane
+        self.user_id = user_id
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+
+    def grant(self):
+        self.granted = True
+        if self.loop:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+        else:
+            self.event.set()
+
+
+class ProviderPool:
+    """Bounded concurrency for one provider with weighted-fair priority lanes.
+
+    Free slots go to the non-empty lane with the lowest virtual pass (stride
+    scheduling), so with weights 6/3/1 premium gets ~60% of contended slots
+    while free traffic still makes progress.
+    """
+    def __init__(self, name, capacity):
+        self.name = name
+        self.capacity = capacity
+        self.in_use = 0
+        self.queues = {lane: deque() for lane in LANES}
+        self.passes = {lane: 0.0 for lane in LANES}
+        self.virtual_time = 0.0
+        self.user_counts = {}
+        self.waits = {lane: deque(maxlen=200) for lane in LANES}
+        self.holds = deque(maxlen=200)
+        self.admitted = 0
+        self.rejected = {"429": 0, "503": 0}
+        self.lock = threading.Lock()
+
+    def _reject(self, message, status, retry_after=5):
+        self.rejected[str(status)] += 1
+        return AdmissionRejected(message, status=status, retry_after=retry_after)
+
+    def _estimated_wait(self, lane):
+        """Rough seconds until a new waiter in this lane is granted, None if unknown"""
+        if not self.holds:
+            return None
+        avg_hold = sum(self.holds) / len(self.holds)
+        active_weight = sum(LANE_WEIGHTS[l] for l in LANES if self.queues[l] or l == lane)
+        slots_ahead = (len(self.queues[lane]) + 1) * active_weight / LANE_WEIGHTS[lane]
+        return slots_ahead * avg_hold / self.capacity
+
+    def _enter(self, lane, user_id, max_wait, loop=None):
+        """Take a slot or join the lane queue. Returns None when admitted immediately."""
+        with self.lock:
+            if user_id and self.user_counts.get(user_id, 0) >= PER_USER_LIMIT:
+                raise self._reject(f"Too many concurrent AI requests (limit {PER_USER_LIMIT})", 429, retry_after=2)
+
+            if self.in_use < self.capacity and not any(self.queues.values()):
+                self.in_use += 1
+                self._admit(lane, 0.0)
+                if user_id:
+                    self.user_counts[user_id] = self.user_counts.get(user_id, 0) + 1
+                return None
+
+            estimate = self._estimated_wait(lane)
+            if estimate is not None and estimate > max_wait:
+                raise self._reject(f"{self.name} is at capacity", 503, retry_after=math.ceil(estimate))
+
+            queue = self.queues[lane]
+            if not queue:
+                # An idle lane rejoins at the current virtual time instead of spending banked credit
+                self.passes[lane] = max(self.passes[lane], self.virtual_time)
+            waiter = _Waiter(lane, user_id, loop)
+            queue.append(waiter)
+            if user_id:
+                self.user_counts[user_id] = self.user_counts.get(user_id, 0) + 1
+            return waiter
+
+    def _admit(self, lane, waited):
+        self.admitted += 1
+        self.waits[lane].append(waited)
+
+    def _next_waiter(self):
+        lanes = [lane for lane in LANES if self.queues[lane]]
+        if not lanes:
+            return None
+        lane = min(lanes, key=lambda l: self.passes[l])
+        self.virtual_time = self.passes[lane]
+        self.passes[lane] += 1.0 / LANE_WEIGHTS[lane]
+        waiter = self.queues[lane].popleft()
+        self._admit(lane, time.monotonic() - waiter.enqueued_at)
+        return waiter
+
+    def _drop_user(self, user_id):
+        if user_id:
+            remaining = self.user_counts.get(user_id, 0) - 1
+            if remaining > 0:
+                self.user_counts[user_id] = remaining
+            else:
+                self.user_counts.pop(user_id, None)
+
+    def release(self, user_id, held=None):
+        with self.lock:
+            if held is not None:
+                self.holds.append(held)
+            self._drop_user(user_id)
+            waiter = self._next_waiter()
+            if waiter:
+                waiter.grant()  # the slot passes straight to the waiter; in_use is unchanged
+            else:
+                self.in_use -= 1
+
+    def _abandon(self, waiter, timed_out=True):
+        """Give up on a queued waiter. Returns True if it was granted a slot in the meantime."""
+        with self.lock:
+            if waiter.granted:
+                return True
+            self.queues[waiter.lane].remove(waiter)
+            self._drop_user(waiter.user_id)
+            if timed_out:
+                self.rejected["503"] += 1
+            return False
+
+    @contextmanager
+    def slot(self, lane, user_id=None, max_wait=MAX_QUEUE_WAIT):
+        waiter = self._enter(lane, user_id, max_wait)
+        if waiter and not waiter.event.wait(max_wait) and not self._abandon(waiter):
+            raise AdmissionRejected(f"Timed out waiting for {self.name}", status=503)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(user_id, time.monotonic() - start)
+
+    @asynccontextmanager
+    async def aslot(self, lane, user_id=None, max_wait=MAX_QUEUE_WAIT):
+        waiter = self._enter(lane, user_id, max_wait, loop=asyncio.get_running_loop())
+        if waiter:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), max_wait)
+            except asyncio.TimeoutError:
+                if not self._abandon(waiter):
+                    raise AdmissionRejected(f"Timed out waiting for {self.name}", status=503)
+            except asyncio.CancelledError:
+                if self._abandon(waiter, timed_out=False):
+                    self.release(user_id)
+                raise
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(user_id, time.monotonic() - start)
+
+    def snapshot(self):
+        with self.lock:
+            waits = {lane: sorted(samples) for lane, samples in self.waits.items()}
+            snapshot = {
+                "capacity": self.capacity,
+                "in_use": self.in_use,
+                "queue_depth": {lane: len(queue) for lane, queue in self.queues.items()},
+                "admitted": self.admitted,
+                "rejected": dict(self.rejected),
+            }
+        snapshot["wait_ms"] = {
+            lane: {
+                "p50": round(samples[len(samples) // 2] * 1000) if samples else None,
+                "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000) if samples else None,
+            }
+            for lane, samples in waits.items()
+        }
+        return snapshot
+
+
+class AdmissionController:
+    """Process-wide LLM admission: one ProviderPool per provider."""
+    def __init__(self):
+        self.capacities = _provider_capacities()
+        self.pools = {}
+        self.lock = threading.Lock()
+
+    def pool(self, provider) -> ProviderPool:
+        with self.lock:
+            if provider not in self.pools:
+                self.pools[provider] = ProviderPool(provider, self.capacities.get(provider, DEFAULT_CAPACITY))
+            return self.pools[provider]
+
+    def snapshot(self):
+        with self.lock:
+            pools = list(self.pools.items())
+        return {provider: pool.snapshot() for provider, pool in pools}
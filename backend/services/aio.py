@@ -0,0 +1,88 @@
+# services/aio.py
+import asyncio
+import os
+import queue
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from services.deadline import carry
+
+BLOCKING_WORKERS = int(os.getenv("ASYNC_BLOCKING_WORKERS", str(min(32, (os.cpu_count() or 1) + 4))))
+
+_loop = None
+_loop_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="blocking")
+_per_loop = weakref.WeakKeyDictionary()
+
+
+def background_loop():
+    """Event loop shared by every WSGI thread in this process (started lazily, after any fork)."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-worker", daemon=True).start()
+    return _loop
+
+
+def run_sync(coro, timeout=None):
+    """Run a coroutine from sync code on the shared loop instead of a throwaway loop per request.
+
+    The caller's LLM deadline travels with it.
+    """
+    return asyncio.run_coroutine_threadsafe(carry(coro), background_loop()).result(timeout)
+
+
+def iterate_sync(agen_factory):
+    """Consume an async generator from sync code (e.g. a Flask streaming response) on the shared loop.
+
+    Closing the returned generator (client disconnect) cancels the async side,
+    including any provider stream it is reading. The caller's LLM deadline travels with it.
+    """
+    items = queue.Queue()
+
+    async def pump():
+        try:
+            async for item in agen_factory():
+                items.put((True, item))
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            items.put((False, e))
+        else:
+            items.put((False, None))
+
+    future = asyncio.run_coroutine_threadsafe(carry(pump()), background_loop())
+    try:
+        while True:
+            ok, item = items.get()
+            if ok:
+                yield item
+            elif item is None:
+                return
+            else:
+                raise item
+    finally:
+        future.cancel()
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run blocking or CPU-bound work (DB, extraction) off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, lambda: fn(*args, **kwargs))
+
+
+def loop_singleton(name, factory):
+    """One instance per running event loop, e.g. pooled async HTTP clients."""
+    loop = asyncio.get_running_loop()
+    instances = _per_loop.setdefault(loop, {})
+    if name not in instances:
+        instances[name] = factory()
+    return instances[name]
+
+
+def http_client():
+    return loop_singleton("httpx", lambda: httpx.AsyncClient(timeout=120))
@@ -0,0 +1,97 @@
+# services/analytics.py
+import atexit
+import os
+import queue
+import threading
+import time
+
+QUEUE_SIZE = int(os.getenv("ANALYTICS_QUEUE_SIZE", "10000"))          # events held in memory; more are dropped
+BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "500"))            # rows per multi-row INSERT
+FLUSH_INTERVAL = float(os.getenv("ANALYTICS_FLUSH_INTERVAL", "2"))    # seconds an event may wait for its batch
+SHUTDOWN_TIMEOUT = float(os.getenv("ANALYTICS_SHUTDOWN_TIMEOUT", "10"))
+
+_STOP = object()
+
+
+class EventWriter:
+    """Buffers analytics rows in a bounded queue; a background thread writes them in batches.
+
+    emit() never blocks a request: when the queue is full the row is dropped and
+    counted. A batch is written once it reaches BATCH_SIZE rows or its oldest row
+    has waited FLUSH_INTERVAL seconds, and whatever is queued is flushed at exit.
+    """
+    def __init__(self, write, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.write = write                  # write(rows): insert a list of row dicts, raise on failure
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.pid = None
+        self.thread = None
+        self.counts = {"written": 0, "dropped": 0, "failed": 0, "batches": 0}
+
+    def start(self):
+        """Start the writer thread; once per process, so forked workers get their own"""
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.queue = queue.Queue(maxsize=self.queue.maxsize)   # rows queued before a fork belong to the parent
+            self.thread = threading.Thread(target=self.run, name="analytics-writer", daemon=True)
+            self.thread.start()
+            atexit.register(self.close)
+
+    def emit(self, row):
+        self.start()
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            with self.lock:
+                self.counts["dropped"] += 1
+
+    def run(self):
+        while True:
+            batch = []
+            item = self.queue.get()
+            flush_at = time.monotonic() + self.flush_interval
+            while item is not _STOP:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get(timeout=max(0.0, flush_at - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                self.flush(batch)
+            if item is _STOP:
+                return
+
+    def flush(self, batch):
+        try:
+            self.write(batch)
+        except Exception as e:
+            print(f"Analytics batch write failed ({len(batch)} events): {e}")
+            with self.lock:
+                self.counts["failed"] += len(batch)
+            return
+        with self.lock:
+            self.counts["written"] += len(batch)
+            self.counts["batches"] += 1
+
+    def close(self, timeout=SHUTDOWN_TIMEOUT):
+        """Flush what is queued and stop the writer (registered with atexit)"""
+        if self.thread is None or self.pid != os.getpid() or not self.thread.is_alive():
+            return
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            print("⚠️ Analytics queue still full at shutdown; unwritten events are lost")
+            return
+        self.thread.join(timeout)
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts, queued=self.queue.qsize(), capacity=self.queue.maxsize)
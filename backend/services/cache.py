@@ -0,0 +1,113 @@
+# services/cache.py
+import os
+import threading
+import time
+
+MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe in-process cache whose entries expire after ttl seconds.
+
+    Every worker process has its own copy: a write invalidates the entry in the
+    process that made it, and the others see the change once theirs expires, so
+    ttl bounds how stale a read can be.
+    """
+    def __init__(self, ttl, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.entries = {}                   # key -> (expires_at, value)
+        self.lock = threading.Lock()
+        self.counts = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, key, default=MISSING):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > now:
+                self.counts["hits"] += 1
+                return entry[1]
+            if entry:
+                del self.entries[key]
+            self.counts["misses"] += 1
+            return default
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        now = time.monotonic()
+        with self.lock:
+            if key not in self.entries and len(self.entries) >= self.maxsize:
+                self.entries = {k: e for k, e in self.entries.items() if e[0] > now}
+                if len(self.entries) >= self.maxsize:
+                    del self.entries[next(iter(self.entries))]   # oldest insert
+            self.entries[key] = (now + self.ttl, value)
+
+    def invalidate(self, key):
+        with self.lock:
+            if self.entries.pop(key, None) is not None:
+                self.counts["invalidations"] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts, size=len(self.entries), ttl=self.ttl)
+
+
+class VersionedValue:
+    """One rarely-changing value (e.g. a settings row) cached per process, reloaded when its version moves.
+
+    A read checks the version at most every poll_interval seconds, one cheap query,
+    and at once when signal_file's mtime changes (workers on one host share it).
+    Writers bump the stored version, commit, then call changed().
+    """
+    def __init__(self, load, current_version, poll_interval, signal_file=None):
+        self.load = load                        # load() -> (version, value)
+        self.current_version = current_version  # current_version() -> version, without loading the value
+        self.poll_interval = poll_interval
+        self.signal_file = signal_file
+        self.state = None                       # (version, value, checked_at, signal mtime), swapped whole
+        self.counts = {"reloads": 0, "polls": 0}
+
+    def signal_mtime(self):
+        if not self.signal_file:
+            return None
+        try:
+            return os.stat(self.signal_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def get(self):
+        now = time.monotonic()
+        signal = self.signal_mtime()
+        state = self.state
+        if state and state[3] == signal and now - state[2] < self.poll_interval:
+            return state[1]
+        if state and state[3] == signal:
+            self.counts["polls"] += 1
+            if self.current_version() == state[0]:
+                self.state = (state[0], state[1], now, signal)
+                return state[1]
+        version, value = self.load()
+        self.counts["reloads"] += 1
+        self.state = (version, value, now, signal)
+        return value
+
+    def changed(self):
+        """Reload on the next read here, and tell the other workers watching signal_file"""
+        self.state = None
+        if self.signal_file:
+            try:
+                with open(self.signal_file, "a"):
+                    pass
+                os.utime(self.signal_file, None)
+            except OSError as e:
+                print(f"⚠️ Could not touch signal file {self.signal_file}: {e}")
+
+    def snapshot(self):
+        state = self.state
+        return dict(self.counts, version=state[0] if state else None,
+                    age_seconds=round(time.monotonic() - state[2], 1) if state else None)
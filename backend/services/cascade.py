@@ -0,0 +1,115 @@
+# services/cascade.py
+import math
+import os
+import re
+import threading
+
+from services.router import NoProviderAvailable
+
+# Model cascade: premium calls are drafted by the small model and only escalated to the large one
+# when a cheap check rejects the draft (broken flashcard JSON, a too-short answer, "I couldn't find this").
+CASCADE_ENABLED = os.getenv("LLM_CASCADE", "false").lower() in ("1", "true", "yes")
+MIN_ANSWER_CHARS = int(os.getenv("CASCADE_MIN_ANSWER_CHARS", "40"))
+MIN_NOTES_CHARS = int(os.getenv("CASCADE_MIN_NOTES_CHARS", "600"))
+MIN_FLASHCARD_RATIO = float(os.getenv("CASCADE_MIN_FLASHCARD_RATIO", "0.75"))  # share of requested cards a draft must produce
+
+NOT_FOUND = re.compile(
+    r"couldn[’']?t find|could not find|unable to find|cannot find|can[’']?t find"
+    r"|(?:is|are) not (?:present|mentioned|covered|included|available|provided) in (?:the|your) (?:document|material|notes|excerpts?)"
+    r"|(?:document|material|notes|excerpts?) (?:does|do) not (?:contain|mention|cover|include)"
+    r"|no (?:relevant )?information (?:about|on|regarding)",
+    re.IGNORECASE
+)
+
+
+def not_found(text):
+    """True if the answer says the material did not contain it"""
+    return bool(NOT_FOUND.search(text or ""))
+
+
+def answer_check(min_chars=MIN_ANSWER_CHARS):
+    """Check for chat answers: long enough and not an "I couldn't find this" reply"""
+    def check(text):
+        if len((text or "").strip()) < min_chars:
+            return "too_short"
+        if not_found(text):
+            return "not_found"
+        return None
+    return check
+
+
+def long_enough(min_chars):
+    def check(text):
+        return "too_short" if len((text or "").strip()) < min_chars else None
+    return check
+
+
+def cards_needed(num_cards):
+    """Complete flashcards a draft must produce to be kept"""
+    return max(1, math.ceil(int(num_cards) * MIN_FLASHCARD_RATIO))
+
+
+class CascadeStats:
+    """Per-task counts of drafts accepted and escalated, with the reasons drafts were rejected."""
+    def __init__(self):
+        self.tasks = {}
+        self.lock = threading.Lock()
+
+    def record(self, task, reason=None):
+        with self.lock:
+            totals = self.tasks.setdefault(task, {"drafts": 0, "accepted": 0, "escalated": 0, "reasons": {}})
+            totals["drafts"] += 1
+            if reason is None:
+                totals["accepted"] += 1
+            else:
+                totals["escalated"] += 1
+                totals["reasons"][reason] = totals["reasons"].get(reason, 0) + 1
+        if reason:
+            print(f"⬆️ Escalating {task} to the larger model: {reason}")
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                task: dict(totals, reasons=dict(totals["reasons"]),
+                           accept_rate=round(totals["accepted"] / totals["drafts"], 3))
+                for task, totals in self.tasks.items()
+            }
+
+
+cascade_stats = CascadeStats()
+
+
+def cascade(task, check, draft_fn, full_fn):
+    """draft_fn()'s answer if it passes check, else full_fn()'s (the draft is kept if escalation fails)"""
+    try:
+        draft = draft_fn()
+        reason = check(draft) if draft else "no_answer"
+    except NoProviderAvailable:
+        draft, reason = None, "draft_failed"
+    cascade_stats.record(task, reason)
+    if reason is None:
+        return draft
+    try:
+        return full_fn() or draft
+    except NoProviderAvailable:
+        if draft:
+            return draft
+        raise
+
+
+async def acascade(task, check, draft_fn, full_fn):
+    """Async cascade(): draft_fn and full_fn return coroutines"""
+    try:
+        draft = await draft_fn()
+        reason = check(draft) if draft else "no_answer"
+    except NoProviderAvailable:
+        draft, reason = None, "draft_failed"
+    cascade_stats.record(task, reason)
+    if reason is None:
+        return draft
+    try:
+        return await full_fn() or draft
+    except NoProviderAvailable:
+        if draft:
+            return draft
+        raise
@@ -0,0 +1,120 @@
+# services/deadline.py
+import asyncio
+import contextvars
+import os
+import random
+import time
+
+REQUEST_DEADLINE = float(os.getenv("LLM_REQUEST_DEADLINE", "60"))       # seconds a request may spend on LLM work
+PROVIDER_TIMEOUT = float(os.getenv("LLM_PROVIDER_TIMEOUT", "120"))      # cap on any single provider call
+RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "3"))              # rounds over the candidate list
+RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+MIN_ATTEMPT_SECONDS = float(os.getenv("LLM_MIN_ATTEMPT_SECONDS", "3"))  # budget an attempt needs to be worth starting
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before any provider answered."""
+
+
+class Deadline:
+    """Absolute time budget for one request, shared by every LLM call it makes."""
+    def __init__(self, seconds=REQUEST_DEADLINE):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, cap=PROVIDER_TIMEOUT):
+        """Timeout for a provider call starting now: what is left of the budget, at most cap"""
+        return min(cap, self.remaining())
+
+    def check(self):
+        if self.expired():
+            raise DeadlineExceeded("LLM deadline exceeded")
+
+
+# Ambient deadline of the current request; worker threads get it passed explicitly
+_current = contextvars.ContextVar("llm_deadline", default=None)
+
+
+def current_deadline():
+    return _current.get()
+
+
+def enter_deadline(seconds=REQUEST_DEADLINE):
+    """Start a deadline for the current context; pass the token to exit_deadline()"""
+    return _current.set(Deadline(seconds))
+
+
+def exit_deadline(token):
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Reset from another context (e.g. a streamed response finishing elsewhere): just clear it
+        _current.set(None)
+
+
+def carry(coro):
+    """Run a coroutine under the caller's deadline when it is scheduled on another thread's loop"""
+    deadline = current_deadline()
+    if deadline is None:
+        return coro
+
+    async def run():
+        _current.set(deadline)  # the task has its own context copy; nothing to reset
+        return await coro
+
+    return run()
+
+
+def provider_timeout(deadline=None, cap=PROVIDER_TIMEOUT):
+    return deadline.timeout(cap) if deadline else cap
+
+
+def backoff(attempt, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """Full-jitter exponential backoff: uniform over [0, min(cap, base * 2**attempt)]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_delay(attempt, deadline=None):
+    """Delay before the next attempt, or None when out of attempts or the budget cannot fit one more"""
+    if attempt + 1 >= RETRY_ATTEMPTS:
+        return None
+    delay = backoff(attempt)
+    if deadline is not None and deadline.remaining() < delay + MIN_ATTEMPT_SECONDS:
+        return None
+    return delay
+
+
+def retry(fn, deadline=None, retryable=lambda e: True):
+    """Call fn until it succeeds, retrying retryable errors with jittered backoff inside the deadline"""
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            delay = retry_delay(attempt, deadline) if retryable(e) else None
+            if delay is None:
+                raise
+            print(f"🔁 Retrying LLM call in {delay:.2f}s (attempt {attempt + 2}): {e}")
+            time.sleep(delay)
+            attempt += 1
+
+
+async def aretry(coro_fn, deadline=None, retryable=lambda e: True):
+    """Async retry(); cancellation during the backoff sleep propagates immediately"""
+    attempt = 0
+    while True:
+        try:
+            return await coro_fn()
+        except Exception as e:
+            delay = retry_delay(attempt, deadline) if retryable(e) else None
+            if delay is None:
+                raise
+            print(f"🔁 Retrying LLM call in {delay:.2f}s (attempt {attempt + 2}): {e}")
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,369 @@
+# services/extractive.py
+import re
+from collections import Counter
+
+# Flashcards and question lists without an LLM: plain regex heuristics, milliseconds per note.
+
+STOPWORDS = set("""
+a an the and or but if then else of to in on at by for with from into onto over under as is are was were be been
+being this that these those it its it's their there here which who whom whose what when where why how not no can
+could should would may might must shall will do does did done has have had having such than also very more most
+other some any each every all both either neither one two three many much few own same so too only just about
+between through during before after above below up down out off again further once we you they he she them his her
+our your i me my us used use using called known given shown like eg ie etc
+""".split())
+
+# "Q.1", "Q1)", "Q. No. 3", "Question 1:", "**Question 1:**", "1.", "1)", "1 ." -- question number at line start
+QUESTION_START = re.compile(r"""
+    ^\s*(?:[-*•]\s+)?(?:\*\*)?\s*
+    (?:
+        Q(?:uestion)?\s*\.?\s*(?:No\.?\s*)?(?P<qnum>\d{1,3}[a-z]?)
+      | (?P<num>\d{1,3})\s*[.)](?!\d)
+    )
+    \s*[.):\-]?\s*(?:\*\*)?\s*[:.\-]?\s*
+""", re.IGNORECASE | re.VERBOSE)
+SUB_QUESTION = re.compile(r"^\s*\((?P<sub>[a-h]|i{1,3}|iv|v|vi{0,3})\)\s*", re.IGNORECASE)
+ANSWER_START = re.compile(r"^\s*(?:[-*•]\s+)?(?:\*\*)?\s*(?:Answer|Ans|Solution)\s*[.:]?\s*(?:\*\*)?\s*[:.\-]?\s*", re.IGNORECASE)
+# Lines that close a question or answer block in generated question-paper notes
+BLOCK_END = re.compile(r"^\s*(?:[-*•]\s+)?(?:⭐|\*\*\s*(?:Important|Study Suggestions|Tips?)\b|#)", re.IGNORECASE)
+MARKS = re.compile(r"[\(\[]\s*(\d{1,2})\s*(?:marks?|m)\s*[\)\]]|\b(\d{1,2})\s*marks?\b", re.IGNORECASE)
+
+HEADING_MD = re.compile(r"^\s*#{1,6}\s+(.+?)\s*#*\s*$")
+HEADING_BOLD = re.compile(r"^\s*\*\*([^*]{2,80})\*\*\s*:?\s*$")
+BULLET = re.compile(r"^\s*(?:[-*•▪►]\s+|✅\s*|\d{1,2}[.)](?!\d)\s*)")
+
+DEFINITION_PATTERNS = [
+    re.compile(r"^(?P<term>[^,;:]{2,60}?)\s+(?P<verb>is|are)\s+(?:defined as|known as|called)\s+(?P<definition>.+)$", re.IGNORECASE),
+    re.compile(r"^(?P<term>[^,;:]{2,60}?)\s+(?P<verb>refers to|refer to|means|denotes|stands for)\s+(?P<definition>.+)$", re.IGNORECASE),
+    re.compile(r"^(?P<term>[^,;:]{2,60}?)\s+(?P<verb>is|are)\s+(?P<definition>(?:a|an|the)\s+.+)$", re.IGNORECASE),
+    re.compile(r"^(?P<term>[^:.?!]{2,60}?)\s*(?:\s[-–—]|:)\s+(?P<definition>.+)$"),
+]
+FORMULA = re.compile(r"^(?P<lhs>[^=<>!]{1,40}?)\s*=\s*(?P<rhs>[^=].*)$")
+MATH_CHARS = re.compile(r"[+\-*/×÷^√∑∫π%()]|\d")
+
+# Bloom-style command verbs, checked against the first words of a question
+DIFFICULTY_VERBS = {
+    "Easy": ("define", "list", "name", "state", "what is", "what are", "who", "when", "identify", "write short",
+             "short note", "give", "mention", "enumerate", "expand"),
+    "Medium": ("explain", "describe", "discuss", "differentiate", "distinguish", "compare", "illustrate", "classify",
+               "summarize", "summarise", "why", "how", "outline", "write"),
+    "Hard": ("derive", "prove", "design", "analyse", "analyze", "evaluate", "construct", "calculate", "compute",
+             "solve", "justify", "critically", "formulate", "implement", "convert"),
+}
+HINTS = {
+    "Easy": "Give a crisp definition of {topic} and one example.",
+    "Medium": "Define {topic}, then explain it step by step; add a diagram or example where it helps.",
+    "Hard": "Set up {topic} from first principles and show every step of the working.",
+}
+TOPIC_NOISE = re.compile(
+    r"^(?:(?:briefly|in brief|in detail|with (?:the help of )?(?:a |an )?(?:neat |suitable )?(?:diagram|example)s?,?|"
+    r"write (?:a )?short notes? on|short notes? on|notes? on|what (?:is|are)|the|a|an|about|on|of|any|"
+    r"define|list|name|state|identify|give|mention|enumerate|expand|explain|describe|discuss|differentiate|"
+    r"distinguish|compare|illustrate|classify|summari[sz]e|why|how|outline|write|derive|prove|design|analy[sz]e|"
+    r"evaluate|construct|calculate|compute|solve|justify|critically|formulate|implement|convert|between)\b[\s,:]*)+",
+    re.IGNORECASE
+)
+
+MAX_ANSWER_CHARS = 300
+
+
+def clean_line(line):
+    """Strip markdown emphasis, bullets and surrounding whitespace"""
+    line = BULLET.sub("", line.strip())
+    return re.sub(r"\*\*|__|`", "", line).strip()
+
+
+def shorten(text, limit=MAX_ANSWER_CHARS):
+    """Cut at the last sentence end before limit, else at a word boundary"""
+    text = " ".join(text.split())
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    end = max(cut.rfind(". "), cut.rfind("? "), cut.rfind("! "))
+    if end > limit // 3:
+        return cut[:end + 1]
+    return cut.rsplit(" ", 1)[0] + "..."
+
+
+def split_sentences(text):
+    sentences = re.split(r"(?<=[.!?।])\s+|\n+", text)
+    return [s.strip() for s in sentences if s.strip()]
+
+
+def word_count(text):
+    return len(re.findall(r"\w+", text))
+
+
+# ==================== QUESTIONS ====================
+
+def extract_questions(text):
+    """Numbered questions (with wrapped lines joined and any generated answer attached).
+
+    Returns [{"number", "question", "marks", "answer"}]. Falls back to lines
+    ending in "?" when the text has no numbered questions.
+    """
+    questions = []
+    current = None
+    in_answer = False
+    expected = None   # number the next top-level question should carry
+    numbered = False  # the current question started with a bare "N." rather than "Q"/"Question"
+
+    def close():
+        if current and current["question"]:
+            current["question"] = " ".join(current["question"].split())
+            current["answer"] = " ".join(current["answer"].split()) or None
+            marks = MARKS.search(current["question"])
+            if marks:
+                current["marks"] = int(marks.group(1) or marks.group(2))
+                current["question"] = MARKS.sub("", current["question"]).strip(" .,-")
+            questions.append(current)
+
+    for raw in (text or "").splitlines():
+        line = raw.strip()
+        start = QUESTION_START.match(line)
+        if start and in_answer and current and not start.group("qnum") and (
+                int(start.group("num")) != expected or not numbered):
+            # A numbered list inside an answer ("1. First step"), not the next question: that needs a
+            # Q/Question prefix, or the next number when the paper numbers questions with bare "N."
+            start = None
+        if start:
+            close()
+            number = start.group("qnum") or start.group("num")
+            expected = int(re.match(r"\d+", number).group()) + 1
+            numbered = not start.group("qnum")
+            rest = line[start.end():]
+            sub = SUB_QUESTION.match(rest)
+            if sub:
+                number, rest = f"{number}({sub.group('sub').lower()})", rest[sub.end():]
+            current = {"number": number, "question": clean_line(rest), "marks": None, "answer": ""}
+            in_answer = False
+            continue
+        if current is None:
+            continue
+        if not line or BLOCK_END.match(line):
+            # A blank line ends a question only once it has text ("1 ." then the question on the next line),
+            # and never an answer, which may run to several paragraphs
+            if BLOCK_END.match(line) or (current["question"] and not in_answer):
+                close()
+                current = None
+            continue
+
+        answer = ANSWER_START.match(line)
+        if answer:
+            in_answer = True
+            line = line[answer.end():]
+        sub = SUB_QUESTION.match(line)
+        if sub and not in_answer and current["question"]:
+            # "(b) ..." on its own line: a sibling part of the same question
+            parent = current["number"].split("(")[0]
+            close()
+            current = {"number": f"{parent}({sub.group('sub').lower()})", "question": clean_line(line[sub.end():]),
+                       "marks": None, "answer": ""}
+            continue
+        key = "answer" if in_answer else "question"
+        current[key] += " " + clean_line(line)
+    close()
+
+    if not questions:
+        questions = [
+            {"number": str(i + 1), "question": clean_line(line), "marks": None, "answer": None}
+            for i, line in enumerate(l for l in (text or "").splitlines() if l.strip().endswith("?"))
+        ]
+    return [q for q in questions if word_count(q["question"]) >= 2]
+
+
+def question_difficulty(question, marks=None):
+    """(difficulty, matched) from the question's command verb, bumped one level for long-answer marks"""
+    head = question.lower()[:60]
+    levels = ["Easy", "Medium", "Hard"]
+    # The earliest command verb wins ("Explain what is..." is Medium); longer phrases break ties
+    found = [
+        (match.start(), -len(verb), name)
+        for name, verbs in DIFFICULTY_VERBS.items() for verb in verbs
+        for match in [re.search(rf"\b{re.escape(verb)}\b", head)] if match
+    ]
+    matched = bool(found)
+    level = min(found)[2] if found else "Medium"
+    if marks and marks >= 10 and level != "Hard":
+        level = levels[levels.index(level) + 1]
+    return level, matched
+
+
+def question_topic(question):
+    """The subject of the question: command verbs and filler stripped, first clause, at most 8 words"""
+    topic = TOPIC_NOISE.sub("", question.strip().rstrip("?.:")).strip()
+    topic = re.split(
+        r",|;|\?|\.\s|\s+with the help of\s+|\s+with (?:a |an )?(?:neat |suitable )?(?:diagram|example)|\s+using\s+|"
+        r"\s+and\s+(?:show|explain|describe|give|write|discuss|draw|state)\b",
+        topic, flags=re.IGNORECASE
+    )[0].strip()
+    words = topic.split()
+    if not words:
+        return question.strip()[:60]
+    topic = " ".join(words[:8])
+    return topic[0].upper() + topic[1:]
+
+
+def analyze_question(question):
+    """Topic / difficulty / hint for one question dict from extract_questions, without an LLM.
+
+    ``confident`` is False when no command verb matched and no answer was found,
+    i.e. when an LLM pass would add the most.
+    """
+    difficulty, matched = question_difficulty(question["question"], question.get("marks"))
+    topic = question_topic(question["question"])
+    if question.get("answer"):
+        hint = shorten(split_sentences(question["answer"])[0], 200)
+    else:
+        hint = HINTS[difficulty].format(topic=topic)
+    return {
+        "topic": topic,
+        "difficulty": difficulty,
+        "hint": hint,
+        "confident": matched or bool(question.get("answer")),
+    }
+
+
+def format_analysis(analysis):
+    """Same text layout the LLM prompt asks for"""
+    return f"Topic: {analysis['topic']}\nDifficulty: {analysis['difficulty']}\nHint: {analysis['hint']}"
+
+
+# ==================== FLASHCARDS ====================
+
+def detect_headings(text):
+    """[(line_index, heading)] for markdown, bold-only and short title lines"""
+    headings = []
+    for i, raw in enumerate((text or "").splitlines()):
+        line = raw.strip()
+        match = HEADING_MD.match(line) or HEADING_BOLD.match(line)
+        if match:
+            headings.append((i, clean_line(match.group(1)).rstrip(":")))
+            continue
+        plain = clean_line(line)
+        if not plain or "=" in plain:
+            continue
+        if (plain.endswith(":") and word_count(plain) <= 6) or (
+            1 <= word_count(plain) <= 6 and plain[0].isupper() and plain.istitle()
+            and not plain.endswith((".", "?", "!", ","))
+        ):
+            headings.append((i, plain.rstrip(":")))
+    return headings
+
+
+def definition_card(sentence):
+    """A "What is X?" card from a definition-shaped sentence, or None"""
+    for pattern in DEFINITION_PATTERNS:
+        match = pattern.match(sentence)
+        if not match:
+            continue
+        term = match.group("term").strip(" -–—")
+        definition = match.group("definition").strip()
+        verb = (match.groupdict().get("verb") or "").lower()
+        if not (1 <= word_count(term) <= 6) or word_count(definition) < 3:
+            continue
+        if term.lower().split()[0] in STOPWORDS or term.lower() in ("note", "example", "examples", "tip", "answer"):
+            continue
+        plural = verb in ("are", "refer to")
+        question = f"What {'are' if plural else 'is'} {term}?"
+        answer = definition if not verb or verb in ("is", "are") else f"{term} {verb} {definition}"
+        return {"question": question, "answer": shorten(answer[0].upper() + answer[1:])}
+    return None
+
+
+def formula_card(line, heading=None):
+    """A formula card from an "lhs = rhs" line, or None"""
+    match = FORMULA.match(line)
+    if not match:
+        return None
+    lhs, rhs = match.group("lhs").strip(" :-"), match.group("rhs").strip().rstrip(".;")
+    if not lhs or not rhs or "http" in line or word_count(lhs) > 5 or not MATH_CHARS.search(rhs + lhs):
+        return None
+    if re.fullmatch(r"[^\W\d_][^\W\d_ ]*(?: [^\W\d_]+)*", lhs) and (" " in lhs or len(lhs) > 3):
+        # A named quantity ("Speed", "Simple Interest") rather than a symbol
+        return {"question": f"What is the formula for {lhs}?", "answer": f"{lhs} = {rhs}"}
+    context = f" ({heading})" if heading else ""
+    return {"question": f"Complete the formula{context}: {lhs} = ____", "answer": rhs}
+
+
+def keyword_counts(text):
+    words = re.findall(r"[^\W\d_][\w\-]{3,}", text.lower())
+    return Counter(w for w in words if w not in STOPWORDS)
+
+
+def cloze_card(sentence, counts, emphasized):
+    """Blank out the sentence's key term: an emphasized term, else its most document-frequent keyword"""
+    if not (8 <= word_count(sentence) <= 45):
+        return None
+    term = next((t for t in emphasized if re.search(rf"\b{re.escape(t)}\b", sentence, re.IGNORECASE)), None)
+    if term is None:
+        candidates = [w for w in re.findall(r"[^\W\d_][\w\-]{3,}", sentence) if w.lower() not in STOPWORDS]
+        candidates = [w for w in candidates if counts[w.lower()] >= 2]
+        if not candidates:
+            return None
+        term = max(candidates, key=lambda w: (counts[w.lower()], len(w)))
+    blanked = re.sub(rf"\b{re.escape(term)}\b", "____", sentence, count=1, flags=re.IGNORECASE)
+    if blanked == sentence:
+        return None
+    return {"question": f"Fill in the blank: {blanked}", "answer": term}
+
+
+def sentence_score(sentence, counts):
+    words = [w for w in re.findall(r"[^\W\d_][\w\-]{3,}", sentence.lower()) if w not in STOPWORDS]
+    return sum(counts[w] for w in set(words)) / (len(words) or 1)
+
+
+def extract_flashcards(text, num_cards=8):
+    """Up to num_cards {question, answer} cards from answered questions, definitions, formulas and cloze deletions.
+
+    Kinds are interleaved in that order so a short deck still mixes card types.
+    Returns fewer cards than asked when the text does not support more.
+    """
+    text = text or ""
+    num_cards = int(num_cards)
+    lines = text.splitlines()
+    headings = dict(detect_headings(text))
+    emphasized = sorted({m.strip() for m in re.findall(r"\*\*([^*\n]{3,40})\*\*", text)
+                         if 1 <= word_count(m) <= 4 and not m.strip().endswith(":")}, key=len, reverse=True)
+    counts = keyword_counts(text)
+
+    qa, definitions, formulas, prose = [], [], [], []
+    for question in extract_questions(text):
+        if question.get("answer"):
+            qa.append({"question": question["question"], "answer": shorten(question["answer"])})
+
+    heading = None
+    for i, raw in enumerate(lines):
+        if i in headings:
+            heading = headings[i]
+            continue
+        if qa and QUESTION_START.match(raw):
+            continue  # already a card
+        line = clean_line(ANSWER_START.sub("", raw))
+        if not line:
+            continue
+        card = formula_card(line, heading)
+        if card:
+            formulas.append(card)
+            continue
+        for sentence in split_sentences(line):
+            card = definition_card(sentence.rstrip("."))
+            if card:
+                definitions.append(card)
+            else:
+                prose.append(sentence)
+
+    prose.sort(key=lambda s: sentence_score(s, counts), reverse=True)
+    cloze = [card for card in (cloze_card(s, counts, emphasized) for s in prose) if card]
+
+    cards, seen = [], set()
+    kinds = [qa, definitions, formulas, cloze]
+    while len(cards) < num_cards and any(kinds):
+        for kind in kinds:
+            if kind and len(cards) < num_cards:
+                card = kind.pop(0)
+                key = card["question"].lower()
+                if key not in seen:
+                    seen.add(key)
+                    cards.append(card)
+    return cards
@@ -0,0 +1,76 @@
+# services/jsonstream.py
+import json
+
+
+class JsonArrayStream:
+    """Incrementally parse a top-level JSON array of objects from streamed text.
+
+    feed() returns each element object as soon as its closing brace arrives, so
+    a completion cut off mid-way still yields every object that finished.
+    Text before the array (prose, a ```json fence) is skipped: only a ``[``
+    followed by optional whitespace and ``{`` opens it, so brackets in the
+    preamble ("2 cards [as requested]:") don't. Non-object elements are ignored.
+    """
+    def __init__(self):
+        self.opening = False    # saw "[" before the array, waiting to see whether "{" follows
+        self.in_array = False
+        self.done = False
+        self.depth = 0          # nesting depth inside the current element
+        self.in_string = False
+        self.escape = False
+        self.buffer = []
+        self.errors = 0         # elements that closed but were not valid JSON
+
+    def feed(self, text):
+        objects = []
+        for ch in text:
+            if self.done:
+                break
+            if not self.in_array:
+                if self.opening and ch == "{":
+                    self.in_array = True
+                    self.depth = 1
+                    self.buffer = [ch]
+                elif ch == "[":
+                    self.opening = True
+                elif not ch.isspace():
+                    self.opening = False
+                continue
+            if self.depth == 0:
+                # Between elements: only an object start or the array end matter
+                if ch == "{":
+                    self.depth = 1
+                    self.buffer = [ch]
+                elif ch == "]":
+                    self.done = True
+                continue
+
+            self.buffer.append(ch)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    try:
+                        obj = json.loads("".join(self.buffer))
+                        if isinstance(obj, dict):
+                            objects.append(obj)
+                    except ValueError:
+                        self.errors += 1
+                    self.buffer = []
+        return objects
+
+    @property
+    def truncated(self):
+        """True if the stream ended inside the array"""
+        return self.in_array and not self.done
+
@@ -0,0 +1,29 @@
+# services/ledger.py
+from sqlalchemy.exc import IntegrityError
+
+APPLIED = "applied"
+SHORT = "short"            # a spend larger than the balance, or no balance row to change
+DUPLICATE = "duplicate"    # the (user_id, reason, ref) key is already in the ledger
+
+
+def apply_token_change(session, stats_table, ledger_table, user_id, delta, reason, ref=None):
+    """Change one balance and append its ledger row inside a savepoint of the session's transaction.
+
+    The balance check and the change are one conditional UPDATE, so concurrent spends
+    can't overdraw; the unique (user_id, reason, ref) key makes a ref apply once.
+    Either outcome other than APPLIED rolls back only this savepoint. Nothing is committed.
+    """
+    update = stats_table.update().where(stats_table.c.user_id == user_id).values(tokens=stats_table.c.tokens + delta)
+    if delta < 0:
+        update = update.where(stats_table.c.tokens >= -delta)
+    savepoint = session.begin_nested()
+    try:
+        if session.execute(update).rowcount != 1:
+            savepoint.rollback()
+            return SHORT
+        session.execute(ledger_table.insert().values(user_id=user_id, delta=delta, reason=reason, ref=ref))
+        savepoint.commit()
+        return APPLIED
+    except IntegrityError:
+        savepoint.rollback()
+        return DUPLICATE
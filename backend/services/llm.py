@@ -1,16 +1,16 @@
 import requests
 import json
 
-OLLAMA_URL = "http://localhost:11434/api/generate"
-MODEL = "llama3"
+from services.deadline import PROVIDER_TIMEOUT
+from services.ollama import OLLAMA_URL as OLLAMA_BASE, OLLAMA_MODEL, generate_body
+
+OLLAMA_URL = OLLAMA_BASE + "/api/generate"
+# Same tag the keeper warms: "llama3" and "llama3:8b" would be loaded as two models
+MODEL = OLLAMA_MODEL
 
 def generate(prompt: str) -> str:
-    payload = {
-        "model": MODEL,
-        "prompt": prompt,
-        "stream": False
-    }
-    res = requests.post(OLLAMA_URL, json=payload)
+    payload = generate_body(MODEL, prompt)
+    res = requests.post(OLLAMA_URL, json=payload, timeout=PROVIDER_TIMEOUT)
     try:
         return res.json().get("response", "").strip()
     except:
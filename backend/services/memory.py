@@ -0,0 +1,107 @@
+# services/memory.py
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from services.prompt import Prompt, count_tokens, truncate_to_tokens
+
+RECENT_TURNS = int(os.getenv("CHAT_RECENT_TURNS", "6"))            # turns always kept verbatim
+HISTORY_TOKENS = int(os.getenv("CHAT_HISTORY_TOKENS", "1500"))      # ceiling for summary + verbatim turns
+SUMMARY_TOKENS = int(os.getenv("CHAT_SUMMARY_TOKENS", "300"))       # target length of the running summary
+SUMMARY_BATCH = int(os.getenv("CHAT_SUMMARY_BATCH", "4"))           # fold once this many turns fall out of the window
+
+SUMMARY_SYSTEM = (
+    "You maintain a compact running summary of a tutoring conversation. "
+    "Keep facts the student shared, topics covered, open questions and any preferences. "
+    "Drop pleasantries. Write plain prose, no headings."
+)
+
+SUMMARY_TEMPLATE = """
+Update the running summary with the new conversation turns below.
+Keep it under {summary_tokens} tokens.
+
+Current summary:
+{summary}
+
+New turns:
+{context}
+"""
+
+
+def turns_to_messages(turns):
+    """[(message, response), ...] oldest first -> chat messages"""
+    messages = []
+    for message, response in turns:
+        messages.append({"role": "user", "content": message})
+        messages.append({"role": "assistant", "content": response})
+    return messages
+
+
+def build_history(summary, turns, budget=HISTORY_TOKENS, model="gpt-4o-mini"):
+    """Summary plus as many of the newest turns as fit the budget, oldest first.
+
+    Turns past the summary that the background refresh has not folded yet are
+    included while they fit; the budget, not the session length, bounds the prompt.
+    """
+    history = []
+    remaining = budget
+    if summary:
+        summary = truncate_to_tokens(summary, min(SUMMARY_TOKENS * 2, budget), model)
+        remaining -= count_tokens(summary, model)
+
+    kept = []
+    for message, response in reversed(turns):
+        cost = count_tokens(message, model) + count_tokens(response, model)
+        if cost > remaining and kept:
+            break
+        if cost > remaining:
+            # The newest turn alone is over budget: keep a trimmed copy so the reply stays coherent
+            response = truncate_to_tokens(response, max(0, remaining - count_tokens(message, model)), model)
+            cost = remaining
+        kept.append((message, response))
+        remaining -= cost
+
+    if summary:
+        history.append({"role": "system", "content": f"Summary of the earlier conversation: {summary}"})
+    history.extend(turns_to_messages(reversed(kept)))
+    return history
+
+
+def history_text(history):
+    return "\n".join(m["content"] for m in history or [])
+
+
+def summary_prompt(summary, turns):
+    transcript = "\n".join(f"Student: {message}\nTutor: {response}" for message, response in turns)
+    return Prompt(SUMMARY_TEMPLATE, transcript, summary=summary or "(none yet)", summary_tokens=SUMMARY_TOKENS,
+                  reserve_output=SUMMARY_TOKENS * 2)
+
+
+def needs_refresh(turn_count, summarized_turns):
+    return turn_count - summarized_turns >= RECENT_TURNS + SUMMARY_BATCH
+
+
+class SummaryRefresher:
+    """Runs summary refreshes off the request path, at most one in flight per session."""
+    def __init__(self, max_workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-summary")
+        self.in_flight = set()
+        self.lock = threading.Lock()
+
+    def schedule(self, session_id, fn):
+        with self.lock:
+            if session_id in self.in_flight:
+                return False
+            self.in_flight.add(session_id)
+
+        def run():
+            try:
+                fn(session_id)
+            except Exception as e:
+                print(f"Chat summary refresh failed for {session_id}: {e}")
+            finally:
+                with self.lock:
+                    self.in_flight.discard(session_id)
+
+        self.executor.submit(run)
+        return True
@@ -0,0 +1,132 @@
+# services/ollama.py
+import os
+import threading
+import time
+
+import requests
+
+from services.prompt import OLLAMA_NUM_CTX, DEFAULT_RESERVE_OUTPUT, count_tokens
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434").rstrip("/")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3:8b")
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")                          # how long Ollama keeps the model after a request
+KEEP_ALIVE_INTERVAL = float(os.getenv("OLLAMA_KEEP_ALIVE_INTERVAL", "300"))  # idle seconds before a keep-alive ping; 0 disables
+WARM_ON_START = os.getenv("OLLAMA_WARM_ON_START", "true").lower() in ("1", "true", "yes")
+WARM_TIMEOUT = float(os.getenv("OLLAMA_WARM_TIMEOUT", "300"))               # loading a model from disk on CPU is slow
+MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", str(os.cpu_count() or 1)))  # default admission capacity
+MIN_PREDICT = 64
+MAX_BACKOFF_FACTOR = 16  # after repeated failed warm-ups, ping at most every 16 intervals
+
+
+def options(*texts, num_ctx=OLLAMA_NUM_CTX, reserve=DEFAULT_RESERVE_OUTPUT):
+    """Ollama options for a prompt made of texts.
+
+    num_ctx is the fixed window prompts are budgeted against: Ollama reloads the
+    model whenever it changes, so it must match what the warm-up loaded.
+    num_predict gets what the prompt leaves of the window, at most reserve.
+    """
+    prompt_tokens = sum(count_tokens(text, OLLAMA_MODEL) + 4 for text in texts)
+    return {"num_ctx": num_ctx, "num_predict": max(MIN_PREDICT, min(reserve, num_ctx - prompt_tokens))}
+
+
+def chat_body(model, messages, stream=False):
+    """/api/chat payload that keeps the model resident and sizes the generation to the prompt"""
+    keeper.touch()
+    return {
+        "model": model,
+        "messages": messages,
+        "stream": stream,
+        "keep_alive": KEEP_ALIVE,
+        "options": options(*(m["content"] for m in messages))
+    }
+
+
+def generate_body(model, prompt, stream=False):
+    keeper.touch()
+    return {"model": model, "prompt": prompt, "stream": stream, "keep_alive": KEEP_ALIVE, "options": options(prompt)}
+
+
+class Keeper:
+    """Loads the model when the process starts and pings it whenever it has sat idle for KEEP_ALIVE_INTERVAL."""
+    def __init__(self, base=OLLAMA_URL, model=OLLAMA_MODEL, interval=KEEP_ALIVE_INTERVAL):
+        self.base = base
+        self.model = model
+        self.interval = interval
+        self.last_used = 0.0
+        self.loaded = False
+        self.warm_seconds = None
+        self.failures = 0       # consecutive failed warm-ups
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def warm(self):
+        """Load the model with the num_ctx requests use (an empty prompt only loads it)"""
+        start = time.monotonic()
+        try:
+            r = requests.post(f"{self.base}/api/generate", json={
+                "model": self.model,
+                "prompt": "",
+                "keep_alive": KEEP_ALIVE,
+                "options": {"num_ctx": OLLAMA_NUM_CTX}
+            }, timeout=WARM_TIMEOUT)
+            r.raise_for_status()
+        except requests.RequestException as e:
+            self.loaded = False
+            self.failures += 1
+            if self.failures == 1:  # one line per outage, not one per retry
+                print(f"⚠️ Ollama warm-up of {self.model} failed, backing off: {e}")
+            return False
+        self.touch()
+        self.loaded = True
+        self.failures = 0
+        self.warm_seconds = round(time.monotonic() - start, 2)
+        print(f"🔥 Ollama {self.model} resident ({self.warm_seconds}s)")
+        return True
+
+    def start(self):
+        """Warm up and keep alive in a daemon thread; once per process, so cheap to call on every request"""
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+        threading.Thread(target=self.run, name="ollama-keepalive", daemon=True).start()
+
+    def backoff(self):
+        """Seconds to wait after a failed warm-up: the interval, doubling per consecutive failure"""
+        return self.interval * min(2 ** (self.failures - 1), MAX_BACKOFF_FACTOR)
+
+    def run(self):
+        warmed = self.warm() if WARM_ON_START else True
+        if self.interval <= 0:
+            return
+        if not warmed:
+            time.sleep(self.backoff())
+        while True:
+            # Without a warm start the model is only kept resident once something has used it
+            if not self.last_used and not WARM_ON_START:
+                time.sleep(self.interval)
+                continue
+            idle = time.monotonic() - self.last_used if self.last_used else self.interval
+            if idle >= self.interval:
+                if not self.warm():
+                    time.sleep(self.backoff())
+                    continue
+                idle = 0
+            time.sleep(max(0, self.interval - idle))
+
+    def snapshot(self):
+        return {
+            "model": self.model,
+            "loaded": self.loaded,
+            "warm_seconds": self.warm_seconds,
+            "failures": self.failures,
+            "idle_seconds": round(time.monotonic() - self.last_used) if self.last_used else None
+        }
+
+
+keeper = Keeper()
@@ -0,0 +1,131 @@
+# services/prompt.py
+import os
+import threading
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # fall back to ~4 characters per token
+    tiktoken = None
+
+# Context windows in tokens; Ollama uses num_ctx (2048 unless the server is configured otherwise)
+CONTEXT_WINDOWS = {
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+}
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "2048"))
+DEFAULT_RESERVE_OUTPUT = int(os.getenv("LLM_RESERVE_OUTPUT_TOKENS", "1024"))
+
+
+@lru_cache(maxsize=None)
+def _encoding(model):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Non-OpenAI models (llama3 etc.): o200k is a close enough estimate for budgeting
+        return tiktoken.get_encoding("o200k_base")
+
+
+def context_window(model):
+    return CONTEXT_WINDOWS.get(model, OLLAMA_NUM_CTX)
+
+
+def count_tokens(text, model="gpt-4o-mini"):
+    if not text:
+        return 0
+    if tiktoken is None:
+        return (len(text) + 3) // 4
+    return len(_encoding(model).encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text, max_tokens, model="gpt-4o-mini"):
+    """Cut text to at most max_tokens tokens (on a token boundary)."""
+    if not text or max_tokens <= 0:
+        return ""
+    if tiktoken is None:
+        return text[:max_tokens * 4]
+    tokens = _encoding(model).encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return _encoding(model).decode(tokens[:max_tokens])
+
+
+def fit_chunks(chunks, max_tokens, model="gpt-4o-mini", separator="\n\n"):
+    """Join whole chunks in rank order until the next one would not fit.
+
+    Only a first chunk larger than the whole budget is cut, so the context is never empty.
+    """
+    parts = []
+    remaining = max_tokens
+    separator_tokens = count_tokens(separator, model)
+    for chunk in chunks:
+        if remaining <= 0:
+            break
+        tokens = count_tokens(chunk, model)
+        if tokens > remaining:
+            if not parts:
+                parts.append(truncate_to_tokens(chunk, remaining, model))
+            break
+        parts.append(chunk)
+        remaining -= tokens + separator_tokens
+    return separator.join(parts)
+
+
+class Prompt:
+    """A user prompt whose variable context is fitted to each target model when it is sent.
+
+    The template keeps its static instructions first and ``{context}`` last, so
+    the system message plus instructions form a byte-identical prefix across
+    requests and provider-side prompt caching can hit.
+    """
+    def __init__(self, template, context="", max_context_tokens=None, reserve_output=DEFAULT_RESERVE_OUTPUT, **fields):
+        self.template = template
+        self.context = context
+        self.max_context_tokens = max_context_tokens
+        self.reserve_output = reserve_output
+        self.fields = fields
+
+    def context_budget(self, model, system=""):
+        fixed = count_tokens(system, model) + count_tokens(self.template.format(context="", **self.fields), model)
+        budget = context_window(model) - self.reserve_output - fixed
+        if self.max_context_tokens is not None:
+            budget = min(budget, self.max_context_tokens)
+        return max(0, budget)
+
+    def render(self, model, system=""):
+        budget = self.context_budget(model, system)
+        if isinstance(self.context, (list, tuple)):
+            context = fit_chunks(self.context, budget, model)
+        else:
+            context = truncate_to_tokens(self.context, budget, model)
+        return self.template.format(context=context, **self.fields)
+
+
+def render_prompt(user, model, system=""):
+    """Plain strings pass through; Prompt objects are fitted to the model."""
+    return user.render(model, system) if isinstance(user, Prompt) else user
+
+
+class UsageStats:
+    """Prompt/completion/cached token totals per provider:model, as reported by the provider."""
+    def __init__(self):
+        self.totals = {}
+        self.lock = threading.Lock()
+
+    def record(self, key, prompt_tokens, completion_tokens, cached_tokens=0):
+        with self.lock:
+            totals = self.totals.setdefault(key, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0})
+            totals["calls"] += 1
+            totals["prompt_tokens"] += prompt_tokens or 0
+            totals["completion_tokens"] += completion_tokens or 0
+            totals["cached_tokens"] += cached_tokens or 0
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                key: dict(totals, avg_prompt_tokens=round(totals["prompt_tokens"] / totals["calls"]))
+                for key, totals in self.totals.items()
+            }
+
+
+usage_stats = UsageStats()
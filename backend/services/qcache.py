@@ -0,0 +1,120 @@
+# services/qcache.py
+import hashlib
+import os
+import re
+import struct
+
+# Near-duplicate matching for exam questions: MinHash over character shingles, banded for LSH lookup.
+# "Q.1 Explain Input Buffering. [5 marks]" and "1) explain input buffering" normalize to the same text;
+# smaller wording differences still land in a shared band, are confirmed by signature similarity, and
+# must keep the same content words, so "... working of a DFA" never matches "... working of an NFA".
+# Shingles are taken over the content words, singular, so plurals and articles don't move the signature.
+
+NUM_PERM = 64
+BANDS = 16                      # 16 bands x 4 rows: pairs above ~0.7 similarity almost always share a band
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+SIMILARITY_THRESHOLD = float(os.getenv("QUESTION_CACHE_SIMILARITY", "0.7"))
+
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+# Fixed seeds: signatures are stored in the database and must be stable across processes
+_PERMUTATIONS = [
+    (int.from_bytes(hashlib.sha256(f"a{i}".encode()).digest()[:8], "big") % _PRIME | 1,
+     int.from_bytes(hashlib.sha256(f"b{i}".encode()).digest()[:8], "big") % _PRIME)
+    for i in range(NUM_PERM)
+]
+
+NUMBERING = re.compile(r"^\s*(?:q(?:uestion)?\s*\.?\s*(?:no\.?\s*)?\d+[a-z]?|\d{1,3}|\(?[a-h]\))\s*[.):\-]?\s*", re.IGNORECASE)
+FILLER = set("a an the of in on to for with and or is are be by its their this that these those following given "
+             "brief briefly detail short".split())
+MARKS = re.compile(r"[\(\[]\s*\d{1,2}\s*(?:marks?|m)\s*[\)\]]|\b\d{1,2}\s*marks?\b", re.IGNORECASE)
+
+
+def normalize_question(text):
+    """Lowercase, numbering/marks/markdown/punctuation stripped, whitespace collapsed"""
+    text = re.sub(r"\*\*|__|`", "", text or "")
+    text = NUMBERING.sub("", text.strip())
+    text = MARKS.sub(" ", text.lower())
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def question_hash(normalized):
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def singular(word):
+    """Drop a plural 's' ("tokens" -> "token", not "class" or "bus")"""
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def shingle_text(normalized):
+    """Content words in order, made singular ("explain tokens and lexemes" -> "explain token lexeme")"""
+    return " ".join(singular(w) for w in normalized.split() if w not in FILLER) or normalized
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def minhash(normalized):
+    """NUM_PERM-value MinHash signature of the character shingles of the question's content words"""
+    hashes = [
+        struct.unpack(">Q", hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest())[0]
+        for s in shingles(shingle_text(normalized))
+    ]
+    return [min(((a * h + b) % _PRIME) & _MASK for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def band_keys(signature):
+    """One lookup key per band; questions sharing any key are near-duplicate candidates"""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f">{ROWS}I", *rows), digest_size=8).hexdigest()
+        keys.append(f"{band:02d}{digest}")
+    return keys
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures"""
+    if not a or not b or len(a) != len(b):
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def content_words(normalized):
+    """Words that carry the question's meaning, with a plural 's' dropped"""
+    return {singular(w) for w in normalized.split() if w not in FILLER}
+
+
+def is_near_duplicate(normalized, signature, other_normalized, other_signature):
+    return (similarity(signature, other_signature) >= SIMILARITY_THRESHOLD
+            and content_words(normalized) == content_words(other_normalized))
+
+
+def pack_signature(signature):
+    return ",".join(str(v) for v in signature)
+
+
+def unpack_signature(value):
+    try:
+        return [int(v) for v in (value or "").split(",") if v]
+    except ValueError:
+        return []
+
+
+def parse_analysis(text):
+    """{"topic", "difficulty", "hint"} from a "Topic: ...\\nDifficulty: ...\\nHint: ..." reply (missing fields None)"""
+    fields = {"topic": None, "difficulty": None, "hint": None}
+    for line in (text or "").splitlines():
+        match = re.match(r"^\W*(topic|difficulty|hint)\W*:\s*(.+)$", line.strip(), re.IGNORECASE)
+        if match and not fields[match.group(1).lower()]:
+            fields[match.group(1).lower()] = match.group(2).strip().strip("*").strip()
+    if fields["difficulty"]:
+        level = re.search(r"easy|medium|hard", fields["difficulty"], re.IGNORECASE)
+        fields["difficulty"] = level.group(0).capitalize() if level else fields["difficulty"][:20]
+    return fields
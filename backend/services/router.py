@@ -0,0 +1,384 @@
+# services/router.py
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from services.admission import AdmissionRejected, MAX_QUEUE_WAIT
+from services.deadline import DeadlineExceeded, current_deadline, retry, aretry
+
+WINDOW = int(os.getenv("LLM_ROUTER_WINDOW", "50"))                  # calls kept per provider/model
+MIN_CALLS = int(os.getenv("LLM_ROUTER_MIN_CALLS", "10"))            # calls needed before error rate counts
+ERROR_RATE_THRESHOLD = float(os.getenv("LLM_ROUTER_ERROR_RATE", "0.5"))
+CONSECUTIVE_FAILURES = int(os.getenv("LLM_ROUTER_CONSECUTIVE_FAILURES", "3"))
+COOLDOWN_SECONDS = float(os.getenv("LLM_ROUTER_COOLDOWN", "30"))     # open -> half-open after this
+HEDGE_ENABLED = os.getenv("LLM_HEDGE", "1") == "1"
+HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "10"))  # used until p95 is known
+HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.5"))
+MAX_WORKERS = int(os.getenv("LLM_ROUTER_WORKERS", "16"))
+
+
+class NoProviderAvailable(Exception):
+    """Raised when every candidate is circuit-broken or has failed.
+
+    ``retryable`` is True when at least one candidate was actually tried, so a
+    later round (after backoff) may succeed.
+    """
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def is_retryable(error):
+    return isinstance(error, NoProviderAvailable) and error.retryable
+
+
+class Candidate:
+    """One provider/model the router may send a request to.
+
+    ``admit`` optionally returns a context manager (async for acall) that holds
+    an admission slot around the call; queue time is not counted as latency.
+    It is called with ``max_wait`` when the request has a deadline, and ``fn``
+    then receives ``deadline=`` so it can size its provider timeout.
+    """
+    def __init__(self, provider, model, fn, admit=None):
+        self.provider = provider
+        self.model = model
+        self.fn = fn
+        self.admit = admit
+
+    @property
+    def key(self):
+        return f"{self.provider}:{self.model}"
+
+
+class ProviderHealth:
+    """Rolling latency/error window and circuit breaker for one provider+model."""
+    def __init__(self, key):
+        self.key = key
+        self.samples = deque(maxlen=WINDOW)  # (ok, latency_seconds)
+        self.state = "closed"                # closed | open | half_open
+        self.opened_at = None
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= COOLDOWN_SECONDS:
+                self.state = "half_open"
+            if self.state == "half_open" and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def record(self, ok: bool, latency: float):
+        with self.lock:
+            self.samples.append((ok, latency))
+            if ok:
+                self.consecutive_failures = 0
+                if self.state != "closed":
+                    print(f"✅ LLM circuit closed for {self.key}")
+                self.state = "closed"
+                self.probe_in_flight = False
+                return
+
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self._should_open():
+                if self.state != "open":
+                    print(f"⚠️ LLM circuit opened for {self.key}")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self.probe_in_flight = False
+
+    def abandon(self):
+        """A cancelled call says nothing about health; just free the half-open probe slot."""
+        with self.lock:
+            self.probe_in_flight = False
+
+    def _should_open(self):
+        if self.consecutive_failures >= CONSECUTIVE_FAILURES:
+            return True
+        if len(self.samples) < MIN_CALLS:
+            return False
+        failures = sum(1 for ok, _ in self.samples if not ok)
+        return failures / len(self.samples) >= ERROR_RATE_THRESHOLD
+
+    def p95(self):
+        with self.lock:
+            latencies = sorted(lat for ok, lat in self.samples if ok)
+        if len(latencies) < MIN_CALLS:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def snapshot(self):
+        with self.lock:
+            samples = list(self.samples)
+            state = self.state
+        ok_latencies = sorted(lat for ok, lat in samples if ok)
+        failures = sum(1 for ok, _ in samples if not ok)
+        return {
+            "state": state,
+            "calls": len(samples),
+            "error_rate": round(failures / len(samples), 3) if samples else 0,
+            "p50_ms": round(ok_latencies[len(ok_latencies) // 2] * 1000) if ok_latencies else None,
+            "p95_ms": round(self.p95() * 1000) if self.p95() is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class ProviderRouter:
+    """Send a request to the healthiest provider, hedging if it is slower than its p95."""
+    def __init__(self, hedge=HEDGE_ENABLED):
+        self.hedge = hedge
+        self.health = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="llm-router")
+        self.local = threading.local()
+
+    def health_for(self, key) -> ProviderHealth:
+        with self.lock:
+            if key not in self.health:
+                self.health[key] = ProviderHealth(key)
+            return self.health[key]
+
+    def hedge_delay(self, candidate):
+        p95 = self.health_for(candidate.key).p95()
+        return max(HEDGE_MIN_DELAY, p95 if p95 is not None else HEDGE_DEFAULT_DELAY)
+
+    def admission(self, candidate, deadline):
+        if not candidate.admit:
+            return nullcontext()
+        if deadline is None:
+            return candidate.admit()
+        # Never queue longer than the request can wait: the pool rejects fast instead
+        return candidate.admit(max_wait=min(MAX_QUEUE_WAIT, deadline.remaining()))
+
+    def _run(self, candidate, args, kwargs, deadline=None):
+        health = self.health_for(candidate.key)
+        start = time.monotonic()  # reset once admitted, so queueing is not counted as latency
+        try:
+            with self.admission(candidate, deadline):
+                start = time.monotonic()
+                result = candidate.fn(*args, **kwargs)
+        except AdmissionRejected:
+            health.abandon()
+            raise
+        except Exception:
+            health.record(False, time.monotonic() - start)
+            raise
+        if result is None or (isinstance(result, str) and not result.strip()):
+            health.record(False, time.monotonic() - start)
+            raise ValueError(f"{candidate.key} returned an empty response")
+        health.record(True, time.monotonic() - start)
+        return result
+
+    def call(self, candidates, *args, deadline=None, **kwargs):
+        """Call candidates in preference order; returns the first successful result.
+
+        Failed rounds are retried with jittered backoff while the deadline (by
+        default the current request's) leaves room for another attempt.
+        """
+        deadline = deadline or current_deadline()
+        candidates = list(candidates)
+        return retry(lambda: self._call_once(candidates, args, kwargs, deadline), deadline, is_retryable)
+
+    def _call_once(self, candidates, args, kwargs, deadline):
+        remaining = list(candidates)
+        if deadline is not None:
+            kwargs = dict(kwargs, deadline=deadline)
+        in_flight = {}
+        last_error = None
+
+        def launch_next():
+            while remaining and not (deadline and deadline.expired()):
+                candidate = remaining.pop(0)
+                if self.health_for(candidate.key).allow():
+                    future = self.executor.submit(self._run, candidate, args, kwargs, deadline)
+                    in_flight[future] = candidate
+                    return candidate
+            return None
+
+        if deadline is not None:
+            deadline.check()
+        if launch_next() is None:
+            raise NoProviderAvailable("All LLM providers are circuit-broken")
+
+        while in_flight:
+            timeout = self.wait_timeout(in_flight, remaining, deadline)
+            done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done and deadline is not None and deadline.expired():
+                # Threads cannot be cancelled; their provider timeouts already end at the deadline
+                raise DeadlineExceeded(f"No LLM answer within the deadline ({len(in_flight)} call(s) abandoned)")
+            if not done:
+                hedged = launch_next()
+                if hedged:
+                    print(f"⏱️ Hedging LLM request to {hedged.key}")
+                continue
+
+            for future in done:
+                candidate = in_flight.pop(future)
+                try:
+                    result = future.result()
+                    self.local.served_by = candidate.key
+                    return result
+                except Exception as e:
+                    print(f"{candidate.provider} failed: {e}")
+                    last_error = e
+
+            if not in_flight:
+                launch_next()
+
+        if isinstance(last_error, AdmissionRejected):
+            raise last_error
+        raise NoProviderAvailable(f"All LLM providers failed: {last_error}", retryable=last_error is not None)
+
+    def wait_timeout(self, in_flight, remaining, deadline):
+        """Wake for the next hedge or the deadline, whichever comes first"""
+        timeouts = []
+        if self.hedge and remaining and len(in_flight) == 1:
+            timeouts.append(self.hedge_delay(next(iter(in_flight.values()))))
+        if deadline is not None:
+            timeouts.append(deadline.remaining())
+        return min(timeouts) if timeouts else None
+
+    async def _arun(self, candidate, args, kwargs, deadline=None):
+        health = self.health_for(candidate.key)
+        start = time.monotonic()  # reset once admitted, so queueing is not counted as latency
+        try:
+            async with self.admission(candidate, deadline):
+                start = time.monotonic()
+                result = await candidate.fn(*args, **kwargs)
+        except (asyncio.CancelledError, AdmissionRejected):
+            health.abandon()
+            raise
+        except Exception:
+            health.record(False, time.monotonic() - start)
+            raise
+        if result is None or (isinstance(result, str) and not result.strip()):
+            health.record(False, time.monotonic() - start)
+            raise ValueError(f"{candidate.key} returned an empty response")
+        health.record(True, time.monotonic() - start)
+        return result
+
+    def served_by(self):
+        """provider:model that answered this thread's last successful call()"""
+        return getattr(self.local, "served_by", None)
+
+    async def acall(self, candidates, *args, deadline=None, **kwargs):
+        """Async call(): candidate fns are coroutines; losing hedges, calls still running at the
+        deadline and calls of a cancelled request are all cancelled, not left running."""
+        deadline = deadline or current_deadline()
+        candidates = list(candidates)
+        return await aretry(lambda: self._acall_once(candidates, args, kwargs, deadline), deadline, is_retryable)
+
+    async def _acall_once(self, candidates, args, kwargs, deadline):
+        remaining = list(candidates)
+        in_flight = {}
+        last_error = None
+        if deadline is not None:
+            kwargs = dict(kwargs, deadline=deadline)
+
+        def launch_next():
+            while remaining and not (deadline and deadline.expired()):
+                candidate = remaining.pop(0)
+                if self.health_for(candidate.key).allow():
+                    task = asyncio.ensure_future(self._arun(candidate, args, kwargs, deadline))
+                    in_flight[task] = candidate
+                    return candidate
+            return None
+
+        if deadline is not None:
+            deadline.check()
+        if launch_next() is None:
+            raise NoProviderAvailable("All LLM providers are circuit-broken")
+
+        try:
+            while in_flight:
+                timeout = self.wait_timeout(in_flight, remaining, deadline)
+                done, _ = await asyncio.wait(list(in_flight), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done and deadline is not None and deadline.expired():
+                    raise DeadlineExceeded(f"No LLM answer within the deadline ({len(in_flight)} call(s) cancelled)")
+                if not done:
+                    hedged = launch_next()
+                    if hedged:
+                        print(f"⏱️ Hedging LLM request to {hedged.key}")
+                    continue
+
+                for task in done:
+                    candidate = in_flight.pop(task)
+                    try:
+                        return task.result()
+                    except Exception as e:
+                        print(f"{candidate.provider} failed: {e}")
+                        last_error = e
+
+                if not in_flight:
+                    launch_next()
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+        if isinstance(last_error, AdmissionRejected):
+            raise last_error
+        raise NoProviderAvailable(f"All LLM providers failed: {last_error}", retryable=last_error is not None)
+
+    async def astream(self, candidates, *args, deadline=None, **kwargs):
+        """Stream chunks from the first healthy candidate (candidate fns are async generators).
+
+        Fails over only before the first chunk arrives; once output has been
+        yielded an error propagates, leaving the caller what it already received.
+        Streams are not hedged or retried; the deadline bounds the wait for the
+        first chunk, and closing the generator cancels the provider stream.
+        """
+        deadline = deadline or current_deadline()
+        if deadline is not None:
+            kwargs = dict(kwargs, deadline=deadline)
+        last_error = None
+        for candidate in candidates:
+            if deadline is not None and deadline.expired():
+                last_error = last_error or DeadlineExceeded("LLM deadline exceeded before the stream started")
+                break
+            health = self.health_for(candidate.key)
+            if not health.allow():
+                continue
+            started = False
+            start = time.monotonic()
+            try:
+                async with self.admission(candidate, deadline):
+                    start = time.monotonic()
+                    async for chunk in candidate.fn(*args, **kwargs):
+                        started = True
+                        yield chunk
+            except (asyncio.CancelledError, GeneratorExit):
+                health.abandon()
+                raise
+            except AdmissionRejected as e:
+                health.abandon()
+                last_error = e
+                continue
+            except Exception as e:
+                health.record(False, time.monotonic() - start)
+                print(f"{candidate.provider} stream failed: {e}")
+                if started:
+                    raise
+                last_error = e
+                continue
+            health.record(started, time.monotonic() - start)
+            if started:
+                return
+            last_error = ValueError(f"{candidate.key} returned an empty stream")
+
+        if isinstance(last_error, (AdmissionRejected, DeadlineExceeded)):
+            raise last_error
+        raise NoProviderAvailable(f"All LLM providers failed: {last_error}")
+
+    def snapshot(self):
+        with self.lock:
+            items = list(self.health.items())
+        return {key: health.snapshot() for key, health in items}
@@ -0,0 +1,90 @@
+# services/singleflight.py
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Flight:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key onto one in-flight computation.
+
+    The first caller for a key runs ``fn``; callers arriving while it runs block
+    and receive the same result (or exception). Nothing is cached once it returns.
+    """
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.RLock()
+
+    def do(self, key, fn):
+        """Returns (result, shared) where shared is True for callers that piggy-backed."""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self.calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    async def ado(self, key, coro_fn):
+        """Async do(): every caller awaits one shared task instead of blocking a thread.
+
+        A cancelled caller (e.g. its client disconnected) only stops waiting; the
+        shared task is cancelled once no caller is left waiting for it.
+        Keys are shared with do(), so keep one SingleFlight per event loop for async callers.
+        """
+        with self.lock:
+            flight = self.calls.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight(asyncio.ensure_future(coro_fn()))
+                self.calls[key] = flight
+                flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            flight.waiters += 1
+
+        try:
+            return await asyncio.shield(flight.task), not leader
+        except asyncio.CancelledError:
+            with self.lock:
+                flight.waiters -= 1
+                abandoned = flight.waiters == 0 and not flight.task.done()
+                if abandoned:
+                    self._forget(key, flight)  # later callers start a fresh flight
+            if abandoned:
+                flight.task.cancel()
+            raise
+
+    def _forget(self, key, flight):
+        with self.lock:
+            if self.calls.get(key) is flight:
+                del self.calls[key]
+
+    def in_flight(self):
+        with self.lock:
+            return len(self.calls)
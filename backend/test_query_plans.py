@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Query plan check for Impify's hot queries
+
+Runs EXPLAIN against the configured database (MYSQL_URL) for each query the app
+issues on a hot path and fails if MySQL would scan the whole table instead of
+using the index declared for it. Run after `python migrate.py upgrade`:
+
+  python test_query_plans.py
+  python test_query_plans.py --min-rows 0     # strict, even on near-empty tables
+
+MySQL prefers a full scan on tiny tables whatever indexes exist, so tables with
+fewer than --min-rows rows only need the index to be usable (in possible_keys).
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+import pytz
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_USER = "00000000-0000-0000-0000-000000000000"
+SAMPLE_ID = "00000000-0000-0000-0000-000000000001"
+FULL_SCANS = ("ALL", "index")   # EXPLAIN access types that read every row (table or index)
+
+
+def hot_queries(server):
+    """(name, table, expected index, query) for each hot query, written as the app writes it"""
+    Note, Flashcard, ChatLog, Notification = server.Note, server.Flashcard, server.ChatLog, server.Notification
+    Analytics, AnalyticsDaily, CommunityLike = server.Analytics, server.AnalyticsDaily, server.CommunityLike
+    now = datetime.now(pytz.timezone('Asia/Kolkata'))
+    midnight = datetime.combine(now.date(), datetime.min.time())
+    return [
+        ("notes of a user, newest first", "notes", "ix_notes_user_created",
+         Note.query.filter_by(user_id=SAMPLE_USER).order_by(Note.created_at.desc())),
+        ("flashcards due for review", "flashcards", "ix_flashcards_user_next_review",
+         Flashcard.query.filter(
+             Flashcard.user_id == SAMPLE_USER,
+             (Flashcard.next_review <= now) | (Flashcard.next_review.is_(None))
+         ).order_by(Flashcard.difficulty_score.desc(), Flashcard.next_review.asc()).limit(20)),
+        ("flashcards of a note", "flashcards", "ix_flashcards_user_note",
+         Flashcard.query.filter_by(note_id=SAMPLE_ID, user_id=SAMPLE_USER)),
+        ("chats today", "chat_logs", "ix_chat_logs_user_timestamp",
+         ChatLog.query.filter(ChatLog.user_id == SAMPLE_USER, ChatLog.timestamp >= midnight)),
+        ("chat session history", "chat_logs", "ix_chat_logs_session_timestamp",
+         ChatLog.query.filter_by(session_id=SAMPLE_ID).order_by(ChatLog.timestamp.desc()).limit(20)),
+        ("unread notifications", "notifications", "ix_notifications_user_read",
+         Notification.query.filter_by(user_id=SAMPLE_USER, is_read=False)),
+        ("recent uploads", "analytics", "ix_analytics_type_timestamp",
+         Analytics.query.filter_by(event_type="file_upload_started").order_by(Analytics.timestamp.desc()).limit(10)),
+        ("last login of a user", "analytics", "ix_analytics_user_type_timestamp",
+         Analytics.query.filter_by(user_id=SAMPLE_USER, event_type="user_login").order_by(Analytics.timestamp.desc()).limit(1)),
+        ("per-user rollup totals", "analytics_daily", "ix_analytics_daily_user_type_day",
+         AnalyticsDaily.query.filter(
+             AnalyticsDaily.event_type.in_(['file_upload_started', 'note_exported', 'ai_generation']),
+             AnalyticsDaily.user_id == SAMPLE_USER
+         )),
+        ("liked by me", "community_likes", "ix_community_likes_post_user",
+         CommunityLike.query.filter_by(post_id=SAMPLE_ID, user_id=SAMPLE_USER)),
+        ("likes of a post", "community_likes", "ix_community_likes_post_user",
+         CommunityLike.query.filter_by(post_id=SAMPLE_ID)),
+    ]
+
+
+def explain(conn, query):
+    compiled = query.statement.compile(dialect=conn.dialect)
+    result = conn.exec_driver_sql("EXPLAIN " + str(compiled), compiled.params)
+    return [dict(row._mapping) for row in result]
+
+
+def table_rows(conn, table):
+    return conn.exec_driver_sql(f"SELECT COUNT(*) FROM `{table}`").scalar()
+
+
+def check(plan, table, index, rows, min_rows):
+    """None if the plan is acceptable, else why not"""
+    steps = [step for step in plan if step.get("table") == table]
+    if not steps:
+        return None if plan and "no matching row" in str(plan[0].get("Extra") or "").lower() else "table missing from plan"
+    step = steps[0]
+    possible = (step.get("possible_keys") or "").split(",")
+    if index not in possible:
+        return f"{index} not usable (possible_keys: {step.get('possible_keys')})"
+    if rows >= min_rows and (step.get("type") in FULL_SCANS or not step.get("key")):
+        return f"full scan (type={step.get('type')}, key={step.get('key')})"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN each hot query and fail on full scans")
+    parser.add_argument("--min-rows", type=int, default=1000,
+                        help="tables smaller than this only need the index in possible_keys")
+    args = parser.parse_args()
+
+    import server
+
+    failures = 0
+    with server.app.app_context():
+        queries = hot_queries(server)
+        with server.db.engine.connect() as conn:
+            for name, table, index, query in queries:
+                plan = explain(conn, query)
+                rows = table_rows(conn, table)
+                problem = check(plan, table, index, rows, args.min_rows)
+                step = next((s for s in plan if s.get("table") == table), {})
+                if problem:
+                    failures += 1
+                    print(f"❌ {name}: {problem}")
+                else:
+                    print(f"✅ {name}: key={step.get('key')} type={step.get('type')} rows~{step.get('rows')} ({rows} in {table})")
+
+    print(f"\n{failures} of {len(queries)} hot queries would scan a full table" if failures
+          else f"\nAll {len(queries)} hot queries use their indexes")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import services/* and server the way the scripts do, from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
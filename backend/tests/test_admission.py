@@ -0,0 +1,149 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from services import admission as admission_module
+from services.admission import AdmissionController, AdmissionRejected, ProviderPool
+
+
+def full_pool(capacity=1):
+    """A pool whose every slot is taken, so new callers queue"""
+    pool = ProviderPool("test", capacity)
+    for _ in range(capacity):
+        assert pool._enter("paid", None, 1) is None
+    return pool
+
+
+def test_admits_immediately_while_below_capacity():
+    pool = ProviderPool("test", 2)
+    with pool.slot("free", user_id=1):
+        with pool.slot("free", user_id=2):
+            assert pool.in_use == 2
+    assert pool.in_use == 0
+    assert pool.admitted == 2
+
+
+def test_contended_slots_follow_the_lane_weights():
+    pool = full_pool()
+    waiters = [pool._enter(lane, None, 60) for lane in ("free", "paid", "premium") for _ in range(20)]
+    granted = []
+    for _ in range(20):
+        pool.release(None)
+        granted.append(next(w for w in waiters if w.granted and w not in granted))
+    lanes = [w.lane for w in granted]
+    assert lanes[0] == "premium"
+    assert Counter(lanes[:10]) == {"premium": 6, "paid": 3, "free": 1}
+    assert Counter(lanes[10:]) == {"premium": 6, "paid": 3, "free": 1}
+    assert pool.in_use == 1  # each release handed its slot straight to a waiter
+
+
+def test_idle_lane_does_not_bank_credit():
+    pool = full_pool()
+    premium = [pool._enter("premium", None, 60) for _ in range(12)]
+    for _ in range(12):
+        pool.release(None)
+    assert all(w.granted for w in premium)
+    # free sat idle while premium advanced; it rejoins at the current virtual time, not at zero
+    free = [pool._enter("free", None, 60) for _ in range(3)]
+    premium = [pool._enter("premium", None, 60) for _ in range(12)]
+    for _ in range(7):
+        pool.release(None)
+    assert sum(w.granted for w in free) == 1
+    assert sum(w.granted for w in premium) == 6
+
+
+def test_per_user_limit_rejects_with_429(monkeypatch):
+    monkeypatch.setattr(admission_module, "PER_USER_LIMIT", 2)
+    pool = ProviderPool("test", 8)
+    with pool.slot("paid", user_id=7), pool.slot("paid", user_id=7):
+        with pytest.raises(AdmissionRejected) as error:
+            with pool.slot("paid", user_id=7):
+                pass
+        assert error.value.status == 429
+        with pool.slot("paid", user_id=8):
+            pass  # the limit is per user
+    assert pool.rejected == {"429": 1, "503": 0}
+    assert pool.user_counts == {}
+    with pool.slot("paid", user_id=7):
+        pass
+
+
+def test_queued_calls_count_towards_the_user_limit(monkeypatch):
+    monkeypatch.setattr(admission_module, "PER_USER_LIMIT", 1)
+    pool = full_pool()
+    assert pool._enter("free", 7, 60) is not None
+    with pytest.raises(AdmissionRejected) as error:
+        pool._enter("free", 7, 60)
+    assert error.value.status == 429
+
+
+def test_rejects_with_503_when_the_estimated_wait_exceeds_max_wait():
+    pool = full_pool()
+    pool.holds.append(10.0)
+    with pytest.raises(AdmissionRejected) as error:
+        pool._enter("paid", 7, max_wait=1)
+    assert error.value.status == 503
+    assert error.value.retry_after == 10
+    assert pool.rejected["503"] == 1
+    assert pool.user_counts == {}
+    assert not any(pool.queues.values())
+
+
+def test_queue_timeout_rejects_with_503_and_leaves_the_queue():
+    pool = full_pool()
+    with pytest.raises(AdmissionRejected) as error:
+        with pool.slot("free", user_id=7, max_wait=0.01):
+            pass
+    assert error.value.status == 503
+    assert pool.rejected["503"] == 1
+    assert pool.user_counts == {}
+    assert not any(pool.queues.values())
+    pool.release(None)
+    assert pool.in_use == 0
+
+
+def test_async_slot_is_granted_on_release():
+    pool = full_pool()
+
+    async def scenario():
+        order = []
+
+        async def wait_for_slot():
+            async with pool.aslot("premium", user_id=7, max_wait=5):
+                order.append("granted")
+
+        task = asyncio.create_task(wait_for_slot())
+        await asyncio.sleep(0.01)
+        assert pool.queues["premium"]
+        order.append("released")
+        pool.release(None)
+        await task
+        return order
+
+    assert asyncio.run(scenario()) == ["released", "granted"]
+    assert pool.in_use == 0
+    assert pool.user_counts == {}
+
+
+def test_async_slot_times_out_with_503():
+    pool = full_pool()
+
+    async def scenario():
+        async with pool.aslot("free", max_wait=0.01):
+            pass
+
+    with pytest.raises(AdmissionRejected) as error:
+        asyncio.run(scenario())
+    assert error.value.status == 503
+    assert not any(pool.queues.values())
+
+
+def test_controller_keeps_one_pool_per_provider(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER_CONCURRENCY", "openai=16,ollama=2")
+    controller = AdmissionController()
+    assert controller.pool("openai") is controller.pool("openai")
+    assert controller.pool("openai").capacity == 16
+    assert controller.pool("ollama").capacity == 2
+    assert controller.pool("other").capacity == admission_module.DEFAULT_CAPACITY
+    assert set(controller.snapshot()) == {"openai", "ollama", "other"}
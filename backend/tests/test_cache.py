@@ -0,0 +1,169 @@
+"""TTLCache and VersionedValue; request_cache lives on flask.g in server.py and is not covered here."""
+import os
+
+import pytest
+
+from services import cache as cache_module
+from services.cache import MISSING, TTLCache, VersionedValue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+class Settings:
+    """Stands in for the settings row: load() reads version and value, current_version() only the version"""
+    def __init__(self):
+        self.version = 1
+        self.value = {"daily_token_cap": 200}
+        self.loads = 0
+        self.version_reads = 0
+
+    def load(self):
+        self.loads += 1
+        return self.version, dict(self.value)
+
+    def current_version(self):
+        self.version_reads += 1
+        return self.version
+
+    def bump(self, **changes):
+        self.value.update(changes)
+        self.version += 1
+
+
+def test_ttl_cache_hits_until_expiry(clock):
+    cache = TTLCache(ttl=60)
+    assert cache.get("a") is MISSING
+    cache.set("a", 1)
+    clock.now += 59
+    assert cache.get("a") == 1
+    clock.now += 1
+    assert cache.get("a") is MISSING
+    assert cache.snapshot()["size"] == 0
+    assert cache.counts == {"hits": 1, "misses": 2, "invalidations": 0}
+
+
+def test_ttl_cache_caches_falsy_values(clock):
+    cache = TTLCache(ttl=60)
+    cache.set("a", None)
+    assert cache.get("a") is None
+    assert cache.get("b", default=None) is None
+    assert cache.counts["hits"] == 1
+
+
+def test_ttl_cache_invalidate(clock):
+    cache = TTLCache(ttl=60)
+    cache.set("a", 1)
+    cache.invalidate("a")
+    cache.invalidate("missing")
+    assert cache.get("a") is MISSING
+    assert cache.counts["invalidations"] == 1
+
+
+def test_ttl_cache_disabled_with_zero_ttl(clock):
+    cache = TTLCache(ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") is MISSING
+
+
+def test_ttl_cache_maxsize_drops_expired_then_oldest(clock):
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.set("a", 1)
+    clock.now += 30
+    cache.set("b", 2)
+    cache.set("c", 3)  # full of live entries: the oldest insert goes
+    assert cache.get("a") is MISSING
+    assert cache.get("b") == 2
+    clock.now += 31    # b expired, c is live
+    cache.set("d", 4)
+    assert cache.get("c") == 3
+    assert cache.get("d") == 4
+    assert len(cache.entries) == 2
+
+
+def test_unchanged_version_serves_the_cached_value(clock):
+    settings = Settings()
+    value = VersionedValue(settings.load, settings.current_version, poll_interval=30)
+    assert value.get() == {"daily_token_cap": 200}
+    clock.now += 10
+    assert value.get() == {"daily_token_cap": 200}
+    assert settings.version_reads == 0  # inside the poll interval nothing is queried
+    clock.now += 30
+    assert value.get() == {"daily_token_cap": 200}
+    assert settings.version_reads == 1
+    assert settings.loads == 1
+    assert value.counts == {"reloads": 1, "polls": 1}
+
+
+def test_poll_restarts_the_interval(clock):
+    settings = Settings()
+    value = VersionedValue(settings.load, settings.current_version, poll_interval=30)
+    value.get()
+    clock.now += 30
+    value.get()
+    clock.now += 29
+    value.get()
+    assert settings.version_reads == 1
+
+
+def test_bumped_version_forces_a_reload(clock):
+    settings = Settings()
+    value = VersionedValue(settings.load, settings.current_version, poll_interval=30)
+    value.get()
+    settings.bump(daily_token_cap=500)
+    clock.now += 10
+    assert value.get() == {"daily_token_cap": 200}  # stale until the next poll
+    clock.now += 20
+    assert value.get() == {"daily_token_cap": 500}
+    assert settings.loads == 2
+    assert value.snapshot()["version"] == 2
+
+
+def test_changed_reloads_on_the_next_read(clock):
+    settings = Settings()
+    value = VersionedValue(settings.load, settings.current_version, poll_interval=3600)
+    value.get()
+    settings.bump(daily_token_cap=500)
+    value.changed()
+    assert value.get() == {"daily_token_cap": 500}
+    assert settings.version_reads == 0
+
+
+def test_signal_file_invalidates_other_workers(clock, tmp_path):
+    signal_file = str(tmp_path / "settings.signal")
+    settings = Settings()
+    reader = VersionedValue(settings.load, settings.current_version, 3600, signal_file)
+    writer = VersionedValue(settings.load, settings.current_version, 3600, signal_file)
+    assert reader.get() == {"daily_token_cap": 200}
+    settings.bump(daily_token_cap=500)
+    writer.changed()  # creates the file
+    assert os.path.exists(signal_file)
+    assert reader.get() == {"daily_token_cap": 500}
+    assert reader.get() == {"daily_token_cap": 500}
+    assert reader.counts["reloads"] == 2
+
+    settings.bump(daily_token_cap=700)
+    os.utime(signal_file, ns=(0, os.stat(signal_file).st_mtime_ns + 1_000_000))
+    assert reader.get() == {"daily_token_cap": 700}
+    assert settings.version_reads == 0  # the signal alone forced each reload
+
+
+def test_missing_signal_file_falls_back_to_polling(clock, tmp_path):
+    settings = Settings()
+    value = VersionedValue(settings.load, settings.current_version, 30, str(tmp_path / "absent"))
+    value.get()
+    settings.bump(daily_token_cap=500)
+    clock.now += 30
+    assert value.get() == {"daily_token_cap": 500}
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+from services import deadline as deadline_module
+from services.deadline import Deadline, DeadlineExceeded, aretry, backoff, retry
+
+
+class FakeClock:
+    """Stands in for the time module: sleeping advances monotonic() instead of blocking"""
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(deadline_module, "time", clock)
+
+    async def fake_asleep(seconds):
+        clock.sleep(seconds)
+    monkeypatch.setattr(deadline_module.asyncio, "sleep", fake_asleep)
+    monkeypatch.setattr(deadline_module, "backoff", lambda attempt: 1.0)
+    monkeypatch.setattr(deadline_module, "MIN_ATTEMPT_SECONDS", 3)
+    monkeypatch.setattr(deadline_module, "RETRY_ATTEMPTS", 5)
+    return clock
+
+
+def failing_calls(clock, cost=0.0, error=RuntimeError):
+    """fn that always fails after taking cost seconds, and the list of its call times"""
+    calls = []
+
+    def fn():
+        calls.append(clock.now)
+        clock.now += cost
+        raise error("down")
+    return fn, calls
+
+
+def test_remaining_never_goes_negative(clock):
+    deadline = Deadline(2)
+    assert deadline.remaining() == 2
+    clock.now += 5
+    assert deadline.remaining() == 0.0
+    assert deadline.expired()
+    assert deadline.timeout(cap=30) == 0.0
+    with pytest.raises(DeadlineExceeded):
+        deadline.check()
+
+
+def test_negative_budget_is_already_expired():
+    deadline = Deadline(-1)
+    assert deadline.remaining() == 0.0
+    assert deadline.expired()
+
+
+def test_timeout_is_capped():
+    assert Deadline(60).timeout(cap=5) == 5
+
+
+def test_backoff_stays_within_bounds():
+    for attempt in range(10):
+        delay = backoff(attempt, base=0.5, cap=8)
+        assert 0 <= delay <= min(8, 0.5 * 2 ** attempt)
+
+
+def test_retry_returns_once_fn_succeeds(clock):
+    results = iter([RuntimeError("down"), RuntimeError("down"), "ok"])
+
+    def fn():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    assert retry(fn, Deadline(60)) == "ok"
+    assert clock.sleeps == [1.0, 1.0]
+
+
+def test_retry_stops_after_the_attempt_limit(clock):
+    fn, calls = failing_calls(clock)
+    with pytest.raises(RuntimeError):
+        retry(fn, Deadline(600))
+    assert len(calls) == deadline_module.RETRY_ATTEMPTS
+
+
+def test_retry_stops_when_the_deadline_cannot_fit_another_attempt(clock):
+    # Each attempt takes 2s and each backoff 1s; a retry needs backoff + 3s of budget left
+    deadline = Deadline(10)
+    fn, calls = failing_calls(clock, cost=2.0)
+    with pytest.raises(RuntimeError):
+        retry(fn, deadline)
+    assert [t - 1000.0 for t in calls] == [0, 3, 6]  # after the third, 2s left < 1 + 3
+    assert clock.sleeps == [1.0, 1.0]
+    assert deadline.remaining() == 2.0
+
+
+def test_retry_does_not_sleep_past_an_expired_deadline(clock):
+    deadline = Deadline(1)
+    fn, calls = failing_calls(clock, cost=5.0)
+    with pytest.raises(RuntimeError):
+        retry(fn, deadline)
+    assert len(calls) == 1
+    assert clock.sleeps == []
+    assert deadline.remaining() == 0.0
+
+
+def test_retry_raises_non_retryable_errors_at_once(clock):
+    fn, calls = failing_calls(clock, error=ValueError)
+    with pytest.raises(ValueError):
+        retry(fn, Deadline(60), retryable=lambda e: not isinstance(e, ValueError))
+    assert len(calls) == 1
+    assert clock.sleeps == []
+
+
+def test_aretry_stops_when_the_deadline_cannot_fit_another_attempt(clock):
+    deadline = Deadline(10)
+    fn, calls = failing_calls(clock, cost=2.0)
+
+    async def coro_fn():
+        return fn()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(aretry(coro_fn, deadline))
+    assert [t - 1000.0 for t in calls] == [0, 3, 6]
+    assert clock.sleeps == [1.0, 1.0]
+
+
+def test_aretry_stops_after_the_attempt_limit(clock):
+    fn, calls = failing_calls(clock)
+
+    async def coro_fn():
+        return fn()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(aretry(coro_fn))
+    assert len(calls) == deadline_module.RETRY_ATTEMPTS
@@ -0,0 +1,66 @@
+from services.extractive import analyze_question, extract_flashcards, extract_questions
+
+
+def numbers(questions):
+    return [q["number"] for q in questions]
+
+
+def test_question_formats():
+    text = "\n".join([
+        "Q.1 Define a compiler. (5 marks)",
+        "Q2) Explain the phases of a compiler",
+        "**Question 3:** Differentiate between NFA and DFA",
+        "4. Construct the LR(0) items for the grammar",
+    ])
+    questions = extract_questions(text)
+    assert numbers(questions) == ["1", "2", "3", "4"]
+    assert questions[0]["question"] == "Define a compiler"
+    assert questions[0]["marks"] == 5
+
+
+def test_wrapped_lines_and_sub_questions():
+    text = "1. Explain the working of a\ntwo pass assembler\n(a) Define a token\n(b) Define a lexeme"
+    questions = extract_questions(text)
+    assert questions[0]["question"] == "Explain the working of a two pass assembler"
+    assert numbers(questions) == ["1", "1(a)", "1(b)"]
+
+
+def test_numbered_list_inside_answer_stays_in_answer():
+    text = "\n".join([
+        "**Question 1:** Explain the phases of a compiler",
+        "**Answer:** A compiler works in phases:",
+        "1. Lexical analysis splits the source into tokens",
+        "",
+        "2. Syntax analysis builds the parse tree",
+        "**Question 2:** Define a token",
+        "**Answer:** The smallest meaningful unit.",
+    ])
+    questions = extract_questions(text)
+    assert numbers(questions) == ["1", "2"]
+    assert "Lexical analysis" in questions[0]["answer"]
+    assert "Syntax analysis builds" in questions[0]["answer"]
+    assert questions[1]["answer"] == "The smallest meaningful unit."
+
+
+def test_next_number_after_answer_starts_question():
+    text = "1. Define a token\nAnswer: 1. A unit of the source\n2. Define a lexeme\n3. Define a pattern"
+    assert numbers(extract_questions(text)) == ["1", "2", "3"]
+
+
+def test_falls_back_to_question_marks():
+    questions = extract_questions("Some notes\nWhat is a parse tree?\nMore notes")
+    assert [q["question"] for q in questions] == ["What is a parse tree?"]
+
+
+def test_analyze_question_difficulty():
+    assert analyze_question({"question": "Define a compiler", "marks": None})["difficulty"] == "Easy"
+    assert analyze_question({"question": "Derive the LR parsing table", "marks": None})["difficulty"] == "Hard"
+    assert analyze_question({"question": "Explain bootstrapping", "marks": 10})["difficulty"] == "Hard"
+
+
+def test_flashcards_from_definitions_and_formulas():
+    text = "Compiler is a program that translates source code into machine code.\nSpeed = distance / time"
+    cards = extract_flashcards(text, num_cards=5)
+    questions = [c["question"] for c in cards]
+    assert "What is Compiler?" in questions
+    assert "What is the formula for Speed?" in questions
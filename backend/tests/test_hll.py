@@ -0,0 +1,51 @@
+import zlib
+
+import pytest
+
+from services.hll import REGISTERS, HyperLogLog
+
+
+def sketch(values):
+    return HyperLogLog().update(values)
+
+
+def within(estimate, actual, tolerance):
+    return abs(estimate - actual) <= tolerance * actual
+
+
+def test_empty_and_duplicates():
+    assert HyperLogLog().count() == 0
+    assert sketch(["u1"] * 50).count() == 1
+
+
+def test_small_counts_are_near_exact():
+    assert sketch(f"user-{i}" for i in range(100)).count() in range(98, 103)
+
+
+@pytest.mark.parametrize("n", [1000, 20000, 100000])
+def test_large_counts_within_error(n):
+    # ~1.6% standard error: 5% is over three sigma
+    assert within(sketch(f"user-{i}" for i in range(n)).count(), n, 0.05)
+
+
+def test_merge_counts_the_union():
+    a = sketch(f"user-{i}" for i in range(0, 6000))
+    b = sketch(f"user-{i}" for i in range(4000, 10000))
+    union = HyperLogLog.union([a, b])
+    assert within(union.count(), 10000, 0.05)
+    assert union.registers == sketch(f"user-{i}" for i in range(10000)).registers
+
+
+def test_merge_is_idempotent():
+    a = sketch(f"user-{i}" for i in range(3000))
+    before = bytes(a.registers)
+    a.merge(sketch(f"user-{i}" for i in range(1000)))
+    assert bytes(a.registers) == before
+
+
+def test_bytes_round_trip():
+    a = sketch(f"user-{i}" for i in range(5000))
+    assert HyperLogLog.from_bytes(a.to_bytes()).registers == a.registers
+    assert HyperLogLog.from_bytes(None).count() == 0
+    with pytest.raises(ValueError):
+        HyperLogLog.from_bytes(zlib.compress(bytes(REGISTERS // 2)))
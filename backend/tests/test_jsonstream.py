@@ -0,0 +1,42 @@
+from services.jsonstream import JsonArrayStream
+
+
+def feed_in_chunks(text, size):
+    parser = JsonArrayStream()
+    objects = []
+    for i in range(0, len(text), size):
+        objects += parser.feed(text[i:i + size])
+    return parser, objects
+
+
+def test_objects_arrive_as_they_close():
+    parser = JsonArrayStream()
+    assert parser.feed('[{"q": "a"}, {"q"') == [{"q": "a"}]
+    assert parser.feed(': "b"}]') == [{"q": "b"}]
+    assert not parser.truncated
+
+
+def test_fenced_array_in_small_chunks():
+    text = 'Sure!\n```json\n[\n  {"q": "a", "tags": ["x", "]"]},\n  {"q": "b \\"quoted\\" }"}\n]\n```'
+    parser, objects = feed_in_chunks(text, 3)
+    assert objects == [{"q": "a", "tags": ["x", "]"]}, {"q": "b \"quoted\" }"}]
+    assert not parser.truncated
+
+
+def test_brackets_in_preamble_are_skipped():
+    text = 'Here are 2 cards [as requested]:\n[{"q": "a"},{"q": "b"}]'
+    for size in (1, 4, len(text)):
+        _, objects = feed_in_chunks(text, size)
+        assert objects == [{"q": "a"}, {"q": "b"}]
+
+
+def test_truncated_stream_keeps_finished_objects():
+    parser, objects = feed_in_chunks('[{"q": "a"}, {"q": "b", "ans', 5)
+    assert objects == [{"q": "a"}]
+    assert parser.truncated
+
+
+def test_invalid_elements_are_counted():
+    parser = JsonArrayStream()
+    assert parser.feed('[{"q": "a",}, {"q": "b"}]') == [{"q": "b"}]
+    assert parser.errors == 1
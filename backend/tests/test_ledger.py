@@ -0,0 +1,94 @@
+"""
+apply_token_change against SQLite: the same conditional UPDATE, savepoint and unique
+(user_id, reason, ref) key change_tokens relies on, without a MySQL server.
+"""
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, UniqueConstraint, create_engine, event, select
+from sqlalchemy.orm import Session
+
+from services.ledger import APPLIED, DUPLICATE, SHORT, apply_token_change
+
+metadata = MetaData()
+user_stats = Table(
+    "user_stats", metadata,
+    Column("user_id", String(36), primary_key=True),
+    Column("tokens", Integer, default=0),
+)
+token_ledger = Table(
+    "token_ledger", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("user_id", String(36), nullable=False),
+    Column("delta", Integer, nullable=False),
+    Column("reason", String(40), nullable=False),
+    Column("ref", String(64)),
+    UniqueConstraint("user_id", "reason", "ref", name="uq_token_ledger_ref"),
+)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+
+    # pysqlite manages transactions itself and breaks SAVEPOINT; let SQLAlchemy emit BEGIN
+    @event.listens_for(engine, "connect")
+    def no_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    metadata.create_all(engine)
+    with Session(engine) as session:
+        session.execute(user_stats.insert().values(user_id="u1", tokens=10))
+        session.commit()
+        yield session
+
+
+def balance(session):
+    return session.execute(select(user_stats.c.tokens)).scalar()
+
+
+def ledger(session):
+    return session.execute(select(token_ledger.c.delta, token_ledger.c.reason, token_ledger.c.ref)
+                           .order_by(token_ledger.c.id)).all()
+
+
+def change(session, delta, reason="chat", ref=None, user_id="u1"):
+    return apply_token_change(session, user_stats, token_ledger, user_id, delta, reason, ref)
+
+
+def test_spend_within_balance(session):
+    assert change(session, -4) == APPLIED
+    session.commit()
+    assert balance(session) == 6
+    assert ledger(session) == [(-4, "chat", None)]
+
+
+def test_spend_beyond_balance_changes_nothing(session):
+    assert change(session, -11) == SHORT
+    session.commit()
+    assert balance(session) == 10
+    assert ledger(session) == []
+
+
+def test_missing_user_is_short(session):
+    assert change(session, 5, user_id="nobody") == SHORT
+    assert ledger(session) == []
+
+
+def test_ref_applies_once_and_keeps_other_changes(session):
+    assert change(session, 25, "purchase", "pay_1") == APPLIED
+    assert change(session, 25, "purchase", "pay_1") == DUPLICATE
+    assert change(session, -5) == APPLIED  # the duplicate rolled back only its own savepoint
+    session.commit()
+    assert balance(session) == 30
+    assert ledger(session) == [(25, "purchase", "pay_1"), (-5, "chat", None)]
+
+
+def test_repeatable_changes_without_ref(session):
+    assert change(session, -1) == APPLIED
+    assert change(session, -1) == APPLIED
+    session.commit()
+    assert balance(session) == 8 == 10 + sum(delta for delta, _, _ in ledger(session))
@@ -0,0 +1,39 @@
+from services.prompt import Prompt, UsageStats, count_tokens, fit_chunks, truncate_to_tokens
+
+
+def test_fit_chunks_keeps_whole_chunks_in_order():
+    chunks = ["alpha beta gamma", "delta epsilon zeta", "eta theta iota kappa lambda mu nu xi omicron"]
+    budget = count_tokens(chunks[0]) + count_tokens("\n\n") + count_tokens(chunks[1]) + 2
+    assert fit_chunks(chunks, budget) == chunks[0] + "\n\n" + chunks[1]
+
+
+def test_fit_chunks_cuts_only_an_oversized_first_chunk():
+    chunk = "word " * 200
+    fitted = fit_chunks([chunk, "short"], 10)
+    assert fitted and chunk.startswith(fitted)
+    assert count_tokens(fitted) <= 10
+
+
+def test_fit_chunks_empty_budget():
+    assert fit_chunks(["anything"], 0) == ""
+
+
+def test_truncate_to_tokens():
+    text = "one two three four five six seven eight nine ten " * 20
+    assert count_tokens(truncate_to_tokens(text, 12)) <= 12
+    assert truncate_to_tokens("short", 100) == "short"
+
+
+def test_prompt_fits_context_to_cap():
+    prompt = Prompt("Summarize this.\n\n{context}", "lorem ipsum " * 2000, max_context_tokens=50)
+    rendered = prompt.render("gpt-4o-mini")
+    assert rendered.startswith("Summarize this.")
+    assert count_tokens(rendered) <= count_tokens("Summarize this.\n\n") + 50
+
+
+def test_usage_stats_totals():
+    stats = UsageStats()
+    stats.record("openai:gpt-4o-mini", 100, 20, 64)
+    stats.record("openai:gpt-4o-mini", 50, 10)
+    totals = stats.snapshot()["openai:gpt-4o-mini"]
+    assert (totals["calls"], totals["prompt_tokens"], totals["cached_tokens"], totals["avg_prompt_tokens"]) == (2, 150, 64, 75)
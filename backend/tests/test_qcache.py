@@ -0,0 +1,42 @@
+from services.qcache import (
+    band_keys, content_words, is_near_duplicate, minhash, normalize_question, parse_analysis, question_hash, similarity,
+)
+
+
+def fingerprint(question):
+    normalized = normalize_question(question)
+    return normalized, minhash(normalized)
+
+
+def near_duplicates(a, b):
+    return is_near_duplicate(*fingerprint(a), *fingerprint(b))
+
+
+def test_numbering_and_marks_normalize_away():
+    a = normalize_question("Q.1 Explain Input Buffering. [5 marks]")
+    b = normalize_question("1) explain input buffering")
+    assert a == b == "explain input buffering"
+    assert question_hash(a) == question_hash(b)
+
+
+def test_plural_variants_share_a_band_and_match():
+    a = fingerprint("Explain token, pattern and lexeme with an example")
+    b = fingerprint("Explain tokens, patterns and lexemes with examples")
+    assert similarity(a[1], b[1]) >= 0.7
+    assert set(band_keys(a[1])) & set(band_keys(b[1]))
+    assert is_near_duplicate(*a, *b)
+
+
+def test_different_content_words_never_match():
+    assert not near_duplicates("Explain the working of a DFA", "Explain the working of an NFA")
+    assert not near_duplicates("Define a class", "Define a bus")
+
+
+def test_content_words_singular():
+    assert content_words("explain tokens and lexemes") == {"explain", "token", "lexeme"}
+    assert content_words("define the class") == {"define", "class"}
+
+
+def test_parse_analysis():
+    fields = parse_analysis("**Topic:** Lexical analysis\nDifficulty: medium-ish\nHint: Tokens first")
+    assert fields == {"topic": "Lexical analysis", "difficulty": "Medium", "hint": "Tokens first"}
@@ -0,0 +1,137 @@
+import asyncio
+import time
+
+import pytest
+
+from services import deadline as deadline_module
+from services import router as router_module
+from services.router import Candidate, NoProviderAvailable, ProviderHealth, ProviderRouter
+
+
+@pytest.fixture(autouse=True)
+def single_round(monkeypatch):
+    # One round over the candidates: retries and their backoff are covered in test_deadline.py
+    monkeypatch.setattr(deadline_module, "RETRY_ATTEMPTS", 1)
+
+
+def failing(message="boom"):
+    def fn(*args, **kwargs):
+        raise RuntimeError(message)
+    return fn
+
+
+def returning(value, delay=0):
+    def fn(*args, **kwargs):
+        time.sleep(delay)
+        return value
+    return fn
+
+
+def test_fails_over_to_the_next_candidate():
+    router = ProviderRouter(hedge=False)
+    result = router.call([Candidate("openai", "a", failing()), Candidate("ollama", "b", returning("ok"))], "prompt")
+    assert result == "ok"
+    assert router.served_by() == "ollama:b"
+    assert [ok for ok, _ in router.health_for("openai:a").samples] == [False]
+    assert [ok for ok, _ in router.health_for("ollama:b").samples] == [True]
+
+
+def test_empty_response_is_recorded_as_a_failure():
+    router = ProviderRouter(hedge=False)
+    with pytest.raises(NoProviderAvailable) as error:
+        router.call([Candidate("openai", "a", returning("   "))])
+    assert error.value.retryable
+    health = router.health_for("openai:a")
+    assert [ok for ok, _ in health.samples] == [False]
+    assert health.consecutive_failures == 1
+
+
+def test_empty_response_fails_over():
+    router = ProviderRouter(hedge=False)
+    assert router.call([Candidate("openai", "a", returning(None)), Candidate("ollama", "b", returning("ok"))]) == "ok"
+
+
+def test_breaker_opens_after_consecutive_failures():
+    router = ProviderRouter(hedge=False)
+    calls = []
+
+    def flaky(*args, **kwargs):
+        calls.append(1)
+        raise RuntimeError("down")
+
+    candidates = [Candidate("openai", "a", flaky)]
+    for _ in range(router_module.CONSECUTIVE_FAILURES):
+        with pytest.raises(NoProviderAvailable):
+            router.call(candidates)
+    assert router.health_for("openai:a").state == "open"
+
+    with pytest.raises(NoProviderAvailable, match="circuit-broken"):
+        router.call(candidates)
+    assert len(calls) == router_module.CONSECUTIVE_FAILURES  # the open breaker sent nothing
+
+
+def test_breaker_half_open_allows_one_probe(monkeypatch):
+    monkeypatch.setattr(router_module, "COOLDOWN_SECONDS", 0)
+    health = ProviderHealth("openai:a")
+    for _ in range(router_module.CONSECUTIVE_FAILURES):
+        health.record(False, 0.1)
+    assert health.state == "open"
+
+    assert health.allow()                 # cooldown over: half-open, one probe
+    assert health.state == "half_open"
+    assert not health.allow()             # a second caller waits for the probe
+    health.record(False, 0.1)             # failed probe re-opens
+    assert health.state == "open"
+
+    assert health.allow()
+    health.record(True, 0.1)              # successful probe closes
+    assert health.state == "closed"
+    assert health.allow() and health.allow()
+
+
+def test_abandoned_probe_frees_the_slot(monkeypatch):
+    monkeypatch.setattr(router_module, "COOLDOWN_SECONDS", 0)
+    health = ProviderHealth("openai:a")
+    for _ in range(router_module.CONSECUTIVE_FAILURES):
+        health.record(False, 0.1)
+    assert health.allow()
+    health.abandon()
+    assert health.allow()
+
+
+def test_error_rate_opens_the_breaker():
+    health = ProviderHealth("openai:a")
+    for i in range(router_module.MIN_CALLS):
+        health.record(i % 2 == 0, 0.1)    # alternating: never CONSECUTIVE_FAILURES in a row
+    assert health.state == "open"
+
+
+def test_slow_candidate_is_hedged(monkeypatch):
+    monkeypatch.setattr(router_module, "HEDGE_DEFAULT_DELAY", 0.05)
+    monkeypatch.setattr(router_module, "HEDGE_MIN_DELAY", 0.01)
+    router = ProviderRouter(hedge=True)
+    start = time.monotonic()
+    result = router.call([Candidate("openai", "a", returning("slow", delay=1)), Candidate("ollama", "b", returning("fast"))])
+    assert result == "fast"
+    assert time.monotonic() - start < 0.9
+
+
+def test_no_hedge_when_disabled(monkeypatch):
+    monkeypatch.setattr(router_module, "HEDGE_DEFAULT_DELAY", 0.01)
+    router = ProviderRouter(hedge=False)
+    result = router.call([Candidate("openai", "a", returning("slow", delay=0.1)), Candidate("ollama", "b", returning("fast"))])
+    assert result == "slow"
+
+
+def test_acall_fails_over_and_records_empty_responses():
+    router = ProviderRouter(hedge=False)
+
+    async def empty(*args, **kwargs):
+        return ""
+
+    async def ok(*args, **kwargs):
+        return "ok"
+
+    result = asyncio.run(router.acall([Candidate("openai", "a", empty), Candidate("ollama", "b", ok)]))
+    assert result == "ok"
+    assert [ok for ok, _ in router.health_for("openai:a").samples] == [False]
@@ -0,0 +1,82 @@
+"""
+spend_tokens / add_tokens against a real MySQL database (the ledger relies on
+conditional UPDATEs, savepoints and a unique key). Point TEST_MYSQL_URL at a
+scratch database; the tests create the two tables they need and delete their rows.
+"""
+
+import os
+import uuid
+
+import pytest
+
+TEST_MYSQL_URL = os.environ.get("TEST_MYSQL_URL")
+pytestmark = pytest.mark.skipif(not TEST_MYSQL_URL, reason="TEST_MYSQL_URL is not set")
+
+
+@pytest.fixture(scope="module")
+def server():
+    os.environ["MYSQL_URL"] = TEST_MYSQL_URL
+    import server as server_module
+    with server_module.app.app_context():
+        for model in (server_module.UserStats, server_module.TokenLedger):
+            model.__table__.create(server_module.db.engine, checkfirst=True)
+        yield server_module
+
+
+@pytest.fixture
+def user_id(server):
+    user_id = str(uuid.uuid4())
+    server.db.session.add(server.UserStats(user_id=user_id, tokens=10, monthly_tokens=100))
+    server.db.session.commit()
+    yield user_id
+    server.db.session.rollback()
+    server.TokenLedger.query.filter_by(user_id=user_id).delete()
+    server.UserStats.query.filter_by(user_id=user_id).delete()
+    server.db.session.commit()
+
+
+def balance(server, user_id):
+    server.db.session.expire_all()
+    return server.UserStats.query.get(user_id).tokens
+
+
+def ledger(server, user_id):
+    return [(e.delta, e.reason, e.ref) for e in
+            server.TokenLedger.query.filter_by(user_id=user_id).order_by(server.TokenLedger.id)]
+
+
+def test_spend_debits_and_records(server, user_id):
+    assert server.spend_tokens(user_id, 3, 'chat')
+    assert balance(server, user_id) == 7
+    assert ledger(server, user_id) == [(-3, 'chat', None)]
+
+
+def test_spend_refuses_short_balance(server, user_id):
+    assert not server.spend_tokens(user_id, 11)
+    assert balance(server, user_id) == 10
+    assert ledger(server, user_id) == []
+
+
+def test_spend_to_zero(server, user_id):
+    assert server.spend_tokens(user_id, 10)
+    assert not server.spend_tokens(user_id, 1)
+    assert balance(server, user_id) == 0
+
+
+def test_add_credits_and_records(server, user_id):
+    assert server.add_tokens(user_id, 25, 'purchase', ref='pay_1')
+    assert balance(server, user_id) == 35
+    assert ledger(server, user_id) == [(25, 'purchase', 'pay_1')]
+
+
+def test_add_applies_a_ref_once(server, user_id):
+    assert server.add_tokens(user_id, 25, 'purchase', ref='pay_1')
+    assert not server.add_tokens(user_id, 25, 'purchase', ref='pay_1')
+    assert balance(server, user_id) == 35
+    assert len(ledger(server, user_id)) == 1
+
+
+def test_add_then_spend_matches_ledger(server, user_id):
+    assert server.add_tokens(user_id, 5)
+    assert server.spend_tokens(user_id, 12)
+    assert balance(server, user_id) == 10 + sum(delta for delta, _, _ in ledger(server, user_id))
@@ -5,7 +5,7 @@ def ensure_user_stats(user_id):
     """Safe user stats creation - handles database errors gracefully"""
     try:
         # Import at function level to avoid circular dependency
-        from server import db, UserStats
+        from server import db, UserStats, TokenLedger
         import pytz
         
         # Check if stats already exist
@@ -30,6 +30,7 @@ def ensure_user_stats(user_id):
         
         # Add to session but don't commit yet (caller will handle commit)
         db.session.add(stats)
+        db.session.add(TokenLedger(user_id=user_id, delta=stats.tokens, reason='signup'))
         return stats
         
     except ImportError as e: